@@ -1,79 +1,198 @@
 #!/usr/bin/env python3
 
-from aws_cdk import App, Environment, Tags
+from aws_cdk import App, Environment, Tags, pipelines
 
-from stacks.cross_account_deploy_pipeline import CrossAccountDeployPipelines
+from stacks.cross_account_deploy_pipeline import (
+    CrossAccountDeployPipelines,
+    CrossAccountDeployPipelineStack,
+    CrossAccountDeployPipelineStage,
+)
+from stacks.cdn_stack import cloudFrontStack
 from stacks.data import load_parameters
+from stacks.ecr_stack import ecrStack
+from stacks.ecs_stack import ecsClusterStack
+from stacks.probe_stack import probeStack
+from stacks.routing_stack import latencyRoutingStack
 from stacks.stages import DeployStage
 from stacks.stages_ad import DeployStageAD
 from stacks.stages_pipeline import DeployStagePipeline
+from stacks.workflow_pipeline_stack import workflowPipelineStack
+from utils.constants import Constants
+from utils.synth_profiler import SynthProfiler
 
 
 PROJECT_NAME = "ecs-demo"
 APP_NAME = "app-deployment"
+# Accounts hosting shared resources, every other account is a deploy environment
+SHARED_ACCOUNTS = ("repository-account", "pipeline-account")
 
 app = App()
 param = load_parameters()
+pipeline_options = param.get("pipelineOptions", {})
+canary = param.get("canary", {})
+rollout = param.get("rollout")
 
+# Canary stages are baked before the Deploy waves of the same pipeline, which only exist in rollout
+# mode: a canary region deploys and bakes every environment before the other regions deploy it.
+if canary.get("environments"):
+    raise ValueError("canary.environments is not supported, every environment has its own pipeline: mark regions with rollout instead")
+if canary.get("regions"):
+    if rollout is None:
+        raise ValueError("canary.regions requires rollout, without it every region has its own pipeline")
+    rollout_regions = [region_name for wave in rollout["waves"] for region_name in wave["regions"]]
+    for region_name in canary["regions"]:
+        if region_name not in rollout_regions:
+            raise ValueError(f"Canary region {region_name} is not in a rollout wave")
+    if set(rollout_regions) <= set(canary["regions"]):
+        raise ValueError("canary.regions leaves no region to deploy after the canary")
 
-for region in param.get("regions"):
+# Opt-in synth profiling: cdk synth -c synth-profile=<output dir>
+profiler = SynthProfiler.from_context(app)
+if profiler is not None:
+    profiler.wrap(
+        DeployStage,
+        DeployStageAD,
+        DeployStagePipeline,
+        CrossAccountDeployPipelineStage,
+        ecsClusterStack,
+        ecrStack,
+        cloudFrontStack,
+        probeStack,
+        latencyRoutingStack,
+        workflowPipelineStack,
+        CrossAccountDeployPipelineStack,
+    )
+    profiler.wrap(CrossAccountDeployPipelines, method_name="add_target_environment")
+    profiler.wrap(pipelines.CodePipeline, method_name="build_pipeline")
+
+
+def create_pipelines(region):
     pipeline_env = Environment(
         account=region["accountId"],
         region=region["region"],
     )
-    pipelines = CrossAccountDeployPipelines(
+    return CrossAccountDeployPipelines(
         app,
         project_name=PROJECT_NAME,
         app_name=APP_NAME,
         pipeline_env=pipeline_env,
         pipeline_region_name_override=region["region"],
-
+        change_set_approval_policy=param.get("changeSetApprovalPolicy"),
+        use_prebuilt_synth_image=pipeline_options.get("prebuiltSynthImage", False),
+        codebuild_cache_mode=pipeline_options.get("codebuildCacheMode"),
+        batch_describe_change_sets=pipeline_options.get("batchDescribeChangeSets", False),
+        consolidate_meta_pipelines=pipeline_options.get("consolidateMetaPipelines", False),
+        canary_bake_config=canary.get("bake"),
+        performance_checks_mode=pipeline_options.get("performanceChecks"),
     )
 
-    for environment, account in param.get("accounts").items():
 
-        deploy_env = Environment(
-            account=region["accountId"], region=region["region"])
-
-        if (environment=="repository-account"):
-            deploy_stage_ad = DeployStageAD(
-                app,
-                f"""{environment}-{region["region"]}""",
-                environment=environment,
-                region=region["region"],
-                env=deploy_env,
-            )
-            pipelines.add_target_environment(
-                environment, deploy_stages=[deploy_stage_ad])
-        elif (environment=="pipeline-account"):
-            deploy_stage_pipeline = DeployStagePipeline(
-                app,
-                f"""{environment}-{region["region"]}""",
-                environment=environment,
-                region=region["region"],
-                app_config=param.get("appConfig", {}),
-                webhook_url_slack = param.get("webhookUrlSlack"),
-                env=deploy_env,
-            )
-            pipelines.add_target_environment(
-                environment, deploy_stages=[deploy_stage_pipeline])
-        else:
-            deploy_stage = DeployStage(
-                app,
-                f"""{environment}-{region["region"]}""",
-                environment=environment,
-                region=region["region"],
-                app_config=param.get("appConfig", {}),
-                env=deploy_env,
-                cidr=account["cidr"],
-                ecr_repository=""
-            )
-
-        
+def create_deploy_stage(environment, account, region):
+    deploy_env = Environment(
+        account=region["accountId"], region=region["region"])
+
+    if (environment=="repository-account"):
+        return DeployStageAD(
+            app,
+            f"""{environment}-{region["region"]}""",
+            environment=environment,
+            region=region["region"],
+            wiring_mode=param.get("appConfig", {}).get("wiringMode", Constants.WIRING_MODE_EXPORTS),
+            env=deploy_env,
+        )
+    elif (environment=="pipeline-account"):
+        return DeployStagePipeline(
+            app,
+            f"""{environment}-{region["region"]}""",
+            environment=environment,
+            region=region["region"],
+            app_config=param.get("appConfig", {}),
+            deploy_environments={
+                name: config for name, config in param.get("accounts").items()
+                if name not in SHARED_ACCOUNTS
+            },
+            webhook_url_slack = param.get("webhookUrlSlack"),
+            env=deploy_env,
+        )
+    else:
+        return DeployStage(
+            app,
+            f"""{environment}-{region["region"]}""",
+            environment=environment,
+            region=region["region"],
+            app_config=param.get("appConfig", {}),
+            env=deploy_env,
+            cidr=account["cidr"],
+            ecr_repository="",
+            env_config=account
+        )
+
+
+def is_canary(environment, region):
+    return environment not in SHARED_ACCOUNTS and region["region"] in canary.get("regions", [])
+
+
+def add_tags(environment):
+    Tags.of(app).add("environment", environment)
+    Tags.of(app).add("Environment", environment)
+    Tags.of(app).add("system", PROJECT_NAME)
+
+
+if rollout is None:
+    # One independent set of pipelines per region:
+    for region in param.get("regions"):
+        pipelines = create_pipelines(region)
+
+        for environment, account in param.get("accounts").items():
+            deploy_stage = create_deploy_stage(environment, account, region)
             pipelines.add_target_environment(
                 environment, deploy_stages=[deploy_stage])
 
-        Tags.of(app).add("environment", environment)
-        Tags.of(app).add("Environment", environment)
-        Tags.of(app).add("system", PROJECT_NAME)
-app.synth()
+            add_tags(environment)
+
+        if pipeline_options.get("consolidateMetaPipelines", False):
+            pipelines.add_consolidated_meta_pipeline()
+else:
+    # One pipeline per environment hosted in the rollout region, deploying the regions
+    # wave by wave. Regions of a wave deploy concurrently, the next wave starts once
+    # every stage of the previous one is deployed and baked.
+    regions = {region["region"]: region for region in param.get("regions")}
+    waves = [wave["regions"] for wave in rollout["waves"]]
+    for region_name in [region_name for wave in waves for region_name in wave]:
+        if region_name not in regions:
+            raise ValueError(f"Rollout region {region_name} is not defined in regions")
+
+    pipelines = create_pipelines(regions[rollout["pipelineRegion"]])
+
+    for environment, account in param.get("accounts").items():
+        canary_stages = []
+        deploy_waves = []
+        for wave in waves:
+            deploy_wave = []
+            for region_name in wave:
+                deploy_stage = create_deploy_stage(environment, account, regions[region_name])
+                if is_canary(environment, regions[region_name]):
+                    canary_stages.append(deploy_stage)
+                else:
+                    deploy_wave.append(deploy_stage)
+            deploy_waves.append(deploy_wave)
+
+        pipelines.add_target_environment(
+            environment,
+            canary_stages=canary_stages,
+            deploy_stages=deploy_waves[0],
+            additional_deploy_waves=deploy_waves[1:],
+        )
+
+        add_tags(environment)
+
+    if pipeline_options.get("consolidateMetaPipelines", False):
+        pipelines.add_consolidated_meta_pipeline()
+
+if profiler is not None:
+    # NOTE: Aspects (cdk-nag) and template rendering run in synth:
+    with profiler.measure("App.synth"):
+        app.synth()
+    profiler.report()
+else:
+    app.synth()
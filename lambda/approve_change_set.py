@@ -0,0 +1,93 @@
+import json
+import os
+
+import boto3
+
+codepipeline = boto3.client("codepipeline")
+
+PIPELINE_NAME = os.environ["PIPELINE_NAME"]
+APPROVE_ACTION_ID = os.environ["APPROVE_ACTION_ID"]
+DESCRIBE_ACTION_ID = os.environ["DESCRIBE_ACTION_ID"]
+DECISION_VARIABLE = os.environ["DECISION_VARIABLE"]
+SUMMARY_VARIABLE = os.environ["SUMMARY_VARIABLE"]
+
+APPROVE = "APPROVE"
+
+
+def get_output_variables(execution_id, stage_name, action_name):
+    """
+    Return the output variables of an action in the given pipeline execution.
+    """
+    paginator = codepipeline.get_paginator("list_action_executions")
+    pages = paginator.paginate(
+        pipelineName=PIPELINE_NAME,
+        filter={"pipelineExecutionId": execution_id},
+    )
+    for page in pages:
+        for action_execution in page["actionExecutionDetails"]:
+            if (
+                action_execution["stageName"] == stage_name
+                and action_execution["actionName"] == action_name
+            ):
+                return action_execution.get("output", {}).get("outputVariables", {})
+    return {}
+
+
+def get_approval_token(stage_name, action_name):
+    """
+    Return the token of the approval action currently waiting for a result.
+    """
+    state = codepipeline.get_pipeline_state(name=PIPELINE_NAME)
+    for stage_state in state["stageStates"]:
+        if stage_state["stageName"] != stage_name:
+            continue
+        for action_state in stage_state.get("actionStates", []):
+            if action_state["actionName"] == action_name:
+                return action_state.get("latestExecution", {}).get("token")
+    return None
+
+
+def lambda_handler(event, context):
+    """
+    Approve ApproveChangeSet actions whose change sets passed the change set policy.
+    """
+
+    detail = event["detail"]
+    action_name = detail["action"]
+    if not action_name.endswith(APPROVE_ACTION_ID):
+        return
+
+    stage_name = detail["stage"]
+    execution_id = detail["execution-id"]
+    describe_action_name = action_name[: -len(APPROVE_ACTION_ID)] + DESCRIBE_ACTION_ID
+
+    variables = get_output_variables(execution_id, stage_name, describe_action_name)
+    decision = variables.get(DECISION_VARIABLE)
+    summary = variables.get(SUMMARY_VARIABLE, "")
+
+    print(json.dumps({
+        "pipeline": PIPELINE_NAME,
+        "executionId": execution_id,
+        "stage": stage_name,
+        "action": action_name,
+        "decision": decision,
+        "summary": summary,
+    }))
+
+    if decision != APPROVE:
+        print("Falling through to manual approval.")
+        return
+
+    token = get_approval_token(stage_name, action_name)
+    if token is None:
+        print("Error: No pending approval found")
+        return
+
+    codepipeline.put_approval_result(
+        pipelineName=PIPELINE_NAME,
+        stageName=stage_name,
+        actionName=action_name,
+        result={"summary": summary[:512], "status": "Approved"},
+        token=token,
+    )
+    print("Approved.")
@@ -0,0 +1,86 @@
+import json
+import os
+from fnmatch import fnmatch
+
+import boto3
+
+codecommit = boto3.client("codecommit")
+codepipeline = boto3.client("codepipeline")
+
+PIPELINE_NAME = os.environ["PIPELINE_NAME"]
+SOURCE_ACTION_NAME = os.environ["SOURCE_ACTION_NAME"]
+TRIGGER_FILTERS = json.loads(os.environ["TRIGGER_FILTERS"])
+
+
+def matches_any(value, patterns):
+    return any(fnmatch(value, pattern) for pattern in patterns)
+
+
+def get_changed_paths(repository_name, old_commit_id, commit_id):
+    """
+    Return the paths of files changed between two commits, following pagination.
+    """
+    kwargs = {"repositoryName": repository_name, "afterCommitSpecifier": commit_id}
+    if old_commit_id:
+        kwargs["beforeCommitSpecifier"] = old_commit_id
+
+    paths = set()
+    while True:
+        response = codecommit.get_differences(**kwargs)
+        for difference in response["differences"]:
+            for blob in ("beforeBlob", "afterBlob"):
+                if blob in difference:
+                    paths.add(difference[blob]["path"])
+
+        if "NextToken" not in response:
+            return paths
+        kwargs["NextToken"] = response["NextToken"]
+
+
+def is_relevant(paths):
+    """
+    Return True if any changed path is included and not excluded by the file path filters.
+    """
+    file_paths = TRIGGER_FILTERS.get("filePaths", {})
+    includes = file_paths.get("includes", ["*"])
+    excludes = file_paths.get("excludes", [])
+    return any(
+        matches_any(path, includes) and not matches_any(path, excludes)
+        for path in paths
+    )
+
+
+def lambda_handler(event, context):
+    """
+    Start the pipeline for pushes to matching branches that change matching files.
+    """
+
+    detail = event["detail"]
+    branch = detail["referenceName"]
+    commit_id = detail["commitId"]
+
+    if not matches_any(branch, TRIGGER_FILTERS["branches"]):
+        print(f"Skipping push to {branch}: branch is not included.")
+        return
+
+    paths = get_changed_paths(detail["repositoryName"], detail.get("oldCommitId"), commit_id)
+    if not is_relevant(paths):
+        print(f"Skipping {commit_id} on {branch}: no included file changed ({len(paths)} changed).")
+        return
+
+    response = codepipeline.start_pipeline_execution(
+        name=PIPELINE_NAME,
+        sourceRevisions=[
+            {
+                "actionName": SOURCE_ACTION_NAME,
+                "revisionType": "COMMIT_ID",
+                "revisionValue": commit_id,
+            }
+        ],
+    )
+    print(json.dumps({
+        "pipeline": PIPELINE_NAME,
+        "branch": branch,
+        "commitId": commit_id,
+        "executionId": response["pipelineExecutionId"],
+    }))
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BASE_URL = os.environ.get("BASE_URL", "")
+PROBE_PATHS = json.loads(os.environ.get("PROBE_PATHS", '["/"]'))
+ENVIRONMENT = os.environ.get("ENVIRONMENT", "local")
+METRIC_NAMESPACE = os.environ.get("METRIC_NAMESPACE", "SyntheticProbe")
+TIMEOUT_SECONDS = float(os.environ.get("TIMEOUT_SECONDS", "5"))
+
+
+def probe(url):
+    """
+    Return (available, latency in milliseconds, status code) of a GET request.
+    """
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=TIMEOUT_SECONDS) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError, OSError) as e:
+        print(f"Error: {url}: {e}", file=sys.stderr)
+        status = None
+    latency = (time.perf_counter() - start) * 1000
+
+    available = status is not None and status < 500
+    return available, latency, status
+
+
+def emit_metrics(path, available, latency, status):
+    """
+    Print the probe result in CloudWatch embedded metric format, Lambda logs turn it into metrics.
+    """
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRIC_NAMESPACE,
+                "Dimensions": [["Environment", "Path"]],
+                "Metrics": [
+                    {"Name": "Availability", "Unit": "None"},
+                    {"Name": "Latency", "Unit": "Milliseconds"},
+                ],
+            }],
+        },
+        "Environment": ENVIRONMENT,
+        "Path": path,
+        "Availability": 1 if available else 0,
+        "Latency": latency,
+        "StatusCode": status,
+    }))
+
+
+def lambda_handler(event, context):
+    """
+    Probe every configured path of the environment and publish latency and availability.
+    """
+
+    results = {}
+    for path in PROBE_PATHS:
+        available, latency, status = probe(BASE_URL + path)
+        emit_metrics(path, available, latency, status)
+        results[path] = {"available": available, "latencyMs": round(latency, 1), "statusCode": status}
+    return results
+
+
+if __name__ == "__main__":
+    # Local run: BASE_URL=http://localhost:8080 python lambda/synthetic_probe.py /web01/index.jsp
+    if len(sys.argv) > 1:
+        PROBE_PATHS = sys.argv[1:]
+    print(json.dumps(lambda_handler({}, None), indent=2), file=sys.stderr)
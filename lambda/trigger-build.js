@@ -2,20 +2,72 @@ const {
     CodeBuildClient,
     StartBuildCommand,
   } = require("@aws-sdk/client-codebuild");
-  
+  const {
+    CodeCommitClient,
+    GetBranchCommand,
+  } = require("@aws-sdk/client-codecommit");
+  const {
+    ECRClient,
+    DescribeImagesCommand,
+  } = require("@aws-sdk/client-ecr");
+
+  // Same tag as CONTENT_TAG in buildspec_build_image.yaml
+  const contentTag = (commitId, inputsHash) =>
+    `${commitId.substring(0, 12)}-${inputsHash.substring(0, 12)}`;
+
+  const findImageDigest = async (ecr, repositoryName, imageTag) => {
+    try {
+      const response = await ecr.send(new DescribeImagesCommand({
+        repositoryName: repositoryName,
+        imageIds: [{ imageTag: imageTag }],
+      }));
+      return response.imageDetails[0].imageDigest;
+    } catch (error) {
+      if (error.name === "ImageNotFoundException") {
+        return null;
+      }
+      throw error;
+    }
+  };
+
   exports.handler = async (event) => {
     const region = process.env.REGION;
     const buildProjectName = process.env.CODEBUILD_PROJECT_NAME;
-  
+    const inputsHash = event.inputsHash || process.env.INPUTS_HASH;
+
+    const codecommit = new CodeCommitClient({ region: region });
+    const branch = await codecommit.send(new GetBranchCommand({
+      repositoryName: process.env.SOURCE_REPOSITORY_NAME,
+      branchName: process.env.SOURCE_BRANCH,
+    }));
+    const commitId = branch.branch.commitId;
+    const imageTag = contentTag(commitId, inputsHash);
+
+    const ecr = new ECRClient({ region: region });
+    const imageDigest = await findImageDigest(ecr, process.env.IMAGE_REPO_NAME, imageTag);
+    if (imageDigest) {
+      console.log(`Image ${imageTag} already built (${imageDigest}), skipping CodeBuild Project.`);
+      return {
+        statusCode: 200,
+        body: `Reusing image ${imageTag}`,
+      };
+    }
+
     const codebuild = new CodeBuildClient({ region: region });
-    const buildCommand = new StartBuildCommand({ projectName: buildProjectName });
-  
-    console.log("Triggering CodeBuild Project...");
+    const buildCommand = new StartBuildCommand({
+      projectName: buildProjectName,
+      sourceVersion: commitId,
+      environmentVariablesOverride: [
+        { name: "INPUTS_HASH", value: inputsHash, type: "PLAINTEXT" },
+      ],
+    });
+
+    console.log(`Triggering CodeBuild Project for image ${imageTag}...`);
     const buildResponse = await codebuild.send(buildCommand);
     console.log(buildResponse);
-  
+
     return {
       statusCode: 200,
       body: "CodeBuild Project building...",
     };
-  };
\ No newline at end of file
+  };
@@ -0,0 +1,290 @@
+"""
+Stream ALB access logs and report latency percentiles and breakdowns.
+
+Reads the gzip access log files written by the ALB of ecsClusterStack, either from
+S3 (s3://bucket/prefix) or from a local directory, one line at a time. Memory is
+bounded: latencies are counted in fixed log-scale histograms (about 5% relative
+error), paths are normalized and the number of tracked paths is capped.
+
+Reported per run and per time window:
+
+    - request / target / response processing time and total latency percentiles
+    - slowest paths by p99 and their request counts
+    - per-target and per-status-code request counts and latency percentiles
+
+Usage:
+
+    python scripts/alb_log_analyzer.py s3://<bucket>/<prefix>/AWSLogs/<account>/elasticloadbalancing/<region>/2024/06/01
+    python scripts/alb_log_analyzer.py ./alb-logs --window-minutes 15 --json report.json
+"""
+
+import argparse
+import gzip
+import io
+import json
+import math
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+LOG_LINE = re.compile(
+    r'(?P<type>\S+) (?P<time>\S+) (?P<elb>\S+) (?P<client>\S+) (?P<target>\S+) '
+    r'(?P<request_processing_time>\S+) (?P<target_processing_time>\S+) (?P<response_processing_time>\S+) '
+    r'(?P<elb_status_code>\S+) (?P<target_status_code>\S+) (?P<received_bytes>\S+) (?P<sent_bytes>\S+) '
+    r'"(?P<request>[^"]*)"'
+)
+# Path segments replaced by a placeholder, so paths with ids group together
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{32,36}|[0-9a-fA-F]{24,})$")
+
+PERCENTILES = (50, 90, 99)
+LATENCY_COMPONENTS = ("request", "target", "response", "total")
+
+HISTOGRAM_MIN_SECONDS = 0.0001
+HISTOGRAM_GROWTH = 1.05
+HISTOGRAM_BUCKETS = 400  # up to ~28 minutes
+
+MAX_TRACKED_PATHS = 2000
+OTHER_PATHS = "(other)"
+SLOWEST_PATHS = 15
+MIN_PATH_REQUESTS = 10
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+class Histogram:
+    """
+    Fixed size log-scale latency histogram.
+    """
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds <= HISTOGRAM_MIN_SECONDS:
+            index = 0
+        else:
+            index = int(math.log(seconds / HISTOGRAM_MIN_SECONDS, HISTOGRAM_GROWTH)) + 1
+        self.counts[min(index, HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percentile):
+        if self.count == 0:
+            return None
+        rank = math.ceil(self.count * percentile / 100)
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                # Upper bound of the bucket, capped by the largest value seen
+                return min(HISTOGRAM_MIN_SECONDS * HISTOGRAM_GROWTH ** index, self.max)
+        return self.max
+
+    def summary(self):
+        summary = {f"p{percentile}": self.percentile(percentile) for percentile in PERCENTILES}
+        summary["count"] = self.count
+        summary["mean"] = self.total / self.count if self.count else None
+        summary["max"] = self.max
+        return summary
+
+
+class Breakdown:
+    """
+    Latency histograms of every component plus counts per status code.
+    """
+
+    def __init__(self):
+        self.latencies = {component: Histogram() for component in LATENCY_COMPONENTS}
+        self.status_codes = {}
+        self.failed = 0
+
+    def add(self, entry):
+        self.status_codes[entry["elb_status_code"]] = self.status_codes.get(entry["elb_status_code"], 0) + 1
+        times = entry["times"]
+        if times is None:
+            # -1 processing times: the request never reached or never got an answer from a target
+            self.failed += 1
+            return
+        for component, seconds in zip(LATENCY_COMPONENTS, times):
+            self.latencies[component].add(seconds)
+
+    def summary(self):
+        return {
+            "latency": {component: histogram.summary() for component, histogram in self.latencies.items()},
+            "statusCodes": dict(sorted(self.status_codes.items())),
+            "failed": self.failed,
+        }
+
+
+class Analyzer:
+    def __init__(self, window_minutes):
+        self.window_seconds = window_minutes * 60
+        self.overall = Breakdown()
+        self.windows = {}
+        self.paths = {}
+        self.targets = {}
+        self.status_codes = {}
+        self.lines = 0
+        self.skipped = 0
+
+    def add_line(self, line):
+        self.lines += 1
+        entry = parse_line(line)
+        if entry is None:
+            self.skipped += 1
+            return
+
+        window = int(entry["time"].timestamp()) // self.window_seconds * self.window_seconds
+        self.overall.add(entry)
+        self.windows.setdefault(window, Breakdown()).add(entry)
+        self.targets.setdefault(entry["target"], Breakdown()).add(entry)
+        self.status_codes.setdefault(entry["elb_status_code"], Breakdown()).add(entry)
+
+        if entry["times"] is None:
+            return
+        path = entry["path"]
+        if path not in self.paths and len(self.paths) >= MAX_TRACKED_PATHS:
+            path = OTHER_PATHS
+        self.paths.setdefault(path, Histogram()).add(entry["times"][-1])
+
+    def report(self):
+        slowest_paths = sorted(
+            (
+                (path, histogram)
+                for path, histogram in self.paths.items()
+                if histogram.count >= MIN_PATH_REQUESTS
+            ),
+            key=lambda item: item[1].percentile(99),
+            reverse=True,
+        )[:SLOWEST_PATHS]
+
+        return {
+            "lines": self.lines,
+            "skipped": self.skipped,
+            "overall": self.overall.summary(),
+            "windows": {
+                f"{datetime.fromtimestamp(window, timezone.utc):%Y-%m-%dT%H:%M:%SZ}": breakdown.summary()
+                for window, breakdown in sorted(self.windows.items())
+            },
+            "slowestPaths": {path: histogram.summary() for path, histogram in slowest_paths},
+            "targets": {target: breakdown.summary() for target, breakdown in sorted(self.targets.items())},
+            "statusCodes": {code: breakdown.summary() for code, breakdown in sorted(self.status_codes.items())},
+        }
+
+
+def normalize_path(request):
+    # request is "<method> <scheme>://<host>:<port>/<path>?<query> <protocol>"
+    parts = request.split(" ")
+    if len(parts) < 2:
+        return request
+    url = parts[1].split("?", 1)[0]
+    path = "/" + url.split("/", 3)[3] if url.count("/") >= 3 else url
+    segments = ["{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/")]
+    return f"""{parts[0]} {"/".join(segments)}"""
+
+
+def parse_line(line):
+    match = LOG_LINE.match(line)
+    if match is None:
+        return None
+
+    times = [
+        float(match["request_processing_time"]),
+        float(match["target_processing_time"]),
+        float(match["response_processing_time"]),
+    ]
+    return {
+        "time": datetime.strptime(match["time"][:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc),
+        "target": match["target"],
+        "elb_status_code": match["elb_status_code"],
+        "times": None if min(times) < 0 else times + [sum(times)],
+        "path": normalize_path(match["request"]),
+    }
+
+
+def iter_local_lines(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            opener = gzip.open if name.endswith(".gz") else open
+            log(f"Reading {path}")
+            with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+                yield from f
+
+
+def iter_s3_lines(url):
+    import boto3
+
+    bucket, _, prefix = url[len("s3://"):].partition("/")
+    s3 = boto3.client("s3")
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get("Contents", []):
+            log(f"""Reading s3://{bucket}/{item["Key"]}""")
+            body = s3.get_object(Bucket=bucket, Key=item["Key"])["Body"]
+            stream = gzip.GzipFile(fileobj=body) if item["Key"].endswith(".gz") else body
+            yield from io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+
+
+def format_seconds(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def format_latency(summary):
+    return " ".join(f"p{percentile}={format_seconds(summary[f'p{percentile}'])}" for percentile in PERCENTILES)
+
+
+def print_report(report):
+    overall = report["overall"]
+    print(f"""{report["lines"]} line(s), {report["skipped"]} unparsed, {overall["failed"]} without target response""")
+    for component, summary in overall["latency"].items():
+        print(f"  {component:<9} {format_latency(summary)} max={format_seconds(summary['max'])}")
+
+    print("\nWindows (total latency):")
+    for window, breakdown in report["windows"].items():
+        total = breakdown["latency"]["total"]
+        print(f"""  {window}  n={total["count"]:<7} {format_latency(total)}  {breakdown["statusCodes"]}""")
+
+    print("\nSlowest paths (total latency):")
+    for path, summary in report["slowestPaths"].items():
+        print(f"""  {format_latency(summary)}  n={summary["count"]:<7} {path}""")
+
+    print("\nTargets (target processing time):")
+    for target, breakdown in report["targets"].items():
+        summary = breakdown["latency"]["target"]
+        print(f"""  {target:<22} n={summary["count"]:<7} {format_latency(summary)}  {breakdown["statusCodes"]}""")
+
+    print("\nStatus codes (total latency):")
+    for code, breakdown in report["statusCodes"].items():
+        summary = breakdown["latency"]["total"]
+        print(f"""  {code}  n={sum(breakdown["statusCodes"].values()):<7} {format_latency(summary)}""")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", help="s3://bucket/prefix or a local directory of log files")
+    parser.add_argument("--window-minutes", type=int, default=5)
+    parser.add_argument("--json", help="also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    lines = iter_s3_lines(args.source) if args.source.startswith("s3://") else iter_local_lines(args.source)
+    analyzer = Analyzer(args.window_minutes)
+    for line in lines:
+        analyzer.add_line(line)
+
+    report = analyzer.report()
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
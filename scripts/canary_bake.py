@@ -0,0 +1,198 @@
+"""
+Bake a canary deployment and fail on CloudWatch alarm or metric regressions.
+
+Runs as the BakeCanary CodeBuild step after each canary stage of
+CrossAccountDeployPipelineStack. For the configured bake time it polls, through the
+CDK lookup role of the canary account:
+
+    - CloudWatch alarms matching the configured name prefixes (any ALARM fails)
+    - ALB p99 target response time and target 5xx count
+    - ECS service CPU utilization
+
+Each metric is checked against its absolute threshold and against the same window
+before the deployment (baseline). The process exits non-zero on the first breach.
+
+Environment variables:
+
+    CANARY_BAKE_CONFIG  JSON object, see DEFAULT_CONFIG for the supported keys
+    CANARY_ACCOUNT      Account of the canary stage
+    CANARY_REGION       Region of the canary stage
+    CDK_QUALIFIER       Qualifier of the CDK bootstrap roles
+    ALB_FULL_NAME       Optional LoadBalancer dimension of the canary ALB
+    ECS_CLUSTER_NAME    Optional ClusterName dimension of the canary service
+    ECS_SERVICE_NAME    Optional ServiceName dimension of the canary service
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import boto3
+
+DEFAULT_CONFIG = {
+    "bakeTimeMinutes": 15,
+    "intervalMinutes": 1,
+    "baselineOffsetMinutes": 60,
+    "alarmNamePrefixes": [],
+    "maxLatencyP99Seconds": None,
+    "maxTarget5xxCount": None,
+    "maxCpuPercent": None,
+    "maxRegressionRatio": None,
+}
+
+
+def log(message):
+    print(f"[{datetime.now(timezone.utc):%H:%M:%S}] {message}", flush=True)
+
+
+def lookup_role_session(account, region, cdk_qualifier):
+    """
+    Return a boto3 session using the CDK lookup role of the given account.
+    """
+    credentials = boto3.client("sts").assume_role(
+        RoleArn=f"arn:aws:iam::{account}:role/cdk-{cdk_qualifier}-lookup-role-{account}-{region}",
+        RoleSessionName="canary-bake",
+    )["Credentials"]
+
+    return boto3.Session(
+        aws_access_key_id=credentials["AccessKeyId"],
+        aws_secret_access_key=credentials["SecretAccessKey"],
+        aws_session_token=credentials["SessionToken"],
+        region_name=region,
+    )
+
+
+def get_metric_checks():
+    """
+    Return (name, namespace, metric, dimensions, statistic, threshold key) of every
+    metric whose dimensions are known.
+    """
+    checks = []
+    alb_full_name = os.environ.get("ALB_FULL_NAME")
+    cluster_name = os.environ.get("ECS_CLUSTER_NAME")
+    service_name = os.environ.get("ECS_SERVICE_NAME")
+
+    if alb_full_name:
+        alb_dimensions = [{"Name": "LoadBalancer", "Value": alb_full_name}]
+        checks.append(("latency p99", "AWS/ApplicationELB", "TargetResponseTime",
+                       alb_dimensions, "p99", "maxLatencyP99Seconds"))
+        checks.append(("target 5xx", "AWS/ApplicationELB", "HTTPCode_Target_5XX_Count",
+                       alb_dimensions, "Sum", "maxTarget5xxCount"))
+    if cluster_name and service_name:
+        service_dimensions = [
+            {"Name": "ClusterName", "Value": cluster_name},
+            {"Name": "ServiceName", "Value": service_name},
+        ]
+        checks.append(("cpu", "AWS/ECS", "CPUUtilization",
+                       service_dimensions, "Average", "maxCpuPercent"))
+    return checks
+
+
+def get_statistic(cloudwatch, namespace, metric, dimensions, statistic, start, end):
+    """
+    Return a single statistic value over [start, end), or None without datapoints.
+    """
+    period = max(60, int((end - start).total_seconds()) // 60 * 60)
+    kwargs = {
+        "Namespace": namespace,
+        "MetricName": metric,
+        "Dimensions": dimensions,
+        "StartTime": start,
+        "EndTime": end,
+        "Period": period,
+    }
+    if statistic.startswith("p"):
+        kwargs["ExtendedStatistics"] = [statistic]
+    else:
+        kwargs["Statistics"] = [statistic]
+
+    datapoints = cloudwatch.get_metric_statistics(**kwargs)["Datapoints"]
+    if not datapoints:
+        return None
+
+    values = [
+        datapoint["ExtendedStatistics"][statistic] if statistic.startswith("p") else datapoint[statistic]
+        for datapoint in datapoints
+    ]
+    return sum(values) if statistic == "Sum" else max(values)
+
+
+def check_alarms(cloudwatch, prefixes):
+    """
+    Return the names of alarms in ALARM state matching any of the prefixes.
+    """
+    alarming = []
+    for prefix in prefixes:
+        paginator = cloudwatch.get_paginator("describe_alarms")
+        for page in paginator.paginate(AlarmNamePrefix=prefix, StateValue="ALARM"):
+            alarming.extend(alarm["AlarmName"] for alarm in page["MetricAlarms"])
+    return alarming
+
+
+def check_metrics(cloudwatch, config, checks, bake_start, now):
+    """
+    Return a list of breaches of the metric thresholds and baseline regressions.
+    """
+    breaches = []
+    window = now - bake_start
+    baseline_end = bake_start - timedelta(minutes=config["baselineOffsetMinutes"])
+    baseline_start = baseline_end - window
+
+    for name, namespace, metric, dimensions, statistic, threshold_key in checks:
+        current = get_statistic(cloudwatch, namespace, metric, dimensions, statistic, bake_start, now)
+        if current is None:
+            log(f"  {name}: no datapoints")
+            continue
+
+        baseline = get_statistic(
+            cloudwatch, namespace, metric, dimensions, statistic, baseline_start, baseline_end
+        )
+        log(f"  {name}: {current:.3f} (baseline {'n/a' if baseline is None else f'{baseline:.3f}'})")
+
+        threshold = config.get(threshold_key)
+        if threshold is not None and current > threshold:
+            breaches.append(f"{name} {current:.3f} exceeds threshold {threshold}")
+
+        ratio = config.get("maxRegressionRatio")
+        if ratio is not None and baseline and current > baseline * ratio:
+            breaches.append(f"{name} {current:.3f} regressed over {ratio}x baseline {baseline:.3f}")
+
+    return breaches
+
+
+def main():
+    config = dict(DEFAULT_CONFIG, **json.loads(os.environ.get("CANARY_BAKE_CONFIG", "{}")))
+    checks = get_metric_checks()
+
+    bake_start = datetime.now(timezone.utc)
+    bake_end = bake_start + timedelta(minutes=config["bakeTimeMinutes"])
+    log(f"Baking canary until {bake_end:%H:%M:%S} UTC with {len(checks)} metric check(s)")
+
+    while True:
+        time.sleep(config["intervalMinutes"] * 60)
+        now = datetime.now(timezone.utc)
+
+        # NOTE: Chained role sessions last at most 1 hour, so every poll assumes the role again.
+        cloudwatch = lookup_role_session(
+            os.environ["CANARY_ACCOUNT"], os.environ["CANARY_REGION"], os.environ["CDK_QUALIFIER"]
+        ).client("cloudwatch")
+
+        alarming = check_alarms(cloudwatch, config["alarmNamePrefixes"])
+        if alarming:
+            log(f"FAILED: alarms in ALARM state: {', '.join(alarming)}")
+            sys.exit(1)
+
+        breaches = check_metrics(cloudwatch, config, checks, bake_start, now)
+        if breaches:
+            log(f"FAILED: {'; '.join(breaches)}")
+            sys.exit(1)
+
+        if now >= bake_end:
+            log("Canary is healthy")
+            return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Recommend the Fargate task size and task counts of each environment from load tests.
+
+Reads a capacity plan (see data/capacity-plan.yaml) with, per tested task size, the
+throughput / p99 latency curve of a single task, and per environment the expected
+base and peak requests per second and the p99 latency SLO.
+
+For every task size the sustainable throughput of one task is the highest RPS whose
+p99 latency still meets the SLO (interpolated between load test steps), scaled down
+by the headroom. The size with the lowest hourly cost at peak wins, and its scaling
+section is printed, or written into accounts.<env>.scaling of data/parameters.yaml
+with --write. ecsClusterStack and the BuildImage task definitions read that section.
+
+Load test curves are inline points or a CSV file, either a Locust stats history
+(*_stats_history.csv, aggregated rows averaged per user count) or a file with rps
+and p99Ms columns.
+
+Usage:
+
+    python scripts/capacity_planner.py data/capacity-plan.yaml
+    python scripts/capacity_planner.py data/capacity-plan.yaml --environment production --write
+"""
+
+import argparse
+import csv
+import math
+import os
+import re
+import sys
+from datetime import date
+
+import yaml
+
+DEFAULT_PARAMETERS_FILE = "data/parameters.yaml"
+DEFAULT_HEADROOM = 0.7
+DEFAULT_BURST_FACTOR = 1.5
+HOURS_PER_MONTH = 730
+
+# Fargate Linux on-demand prices per hour: (per vCPU, per GB), override with prices in the plan
+FARGATE_PRICES = {
+    "us-east-1": {"x86": (0.04048, 0.004445), "arm": (0.03238, 0.00356)},
+    "eu-west-1": {"x86": (0.04048, 0.004445), "arm": (0.03238, 0.00356)},
+    "ap-northeast-1": {"x86": (0.05056, 0.00553), "arm": (0.04045, 0.00442)},
+    "ap-southeast-1": {"x86": (0.05056, 0.00553), "arm": (0.04045, 0.00442)},
+}
+
+# Memory (MiB) allowed per Fargate CPU units: (min, max, step)
+FARGATE_MEMORY = {
+    256: (512, 2048, None),
+    512: (1024, 4096, 1024),
+    1024: (2048, 8192, 1024),
+    2048: (4096, 16384, 1024),
+    4096: (8192, 30720, 1024),
+    8192: (16384, 61440, 4096),
+    16384: (32768, 122880, 8192),
+}
+
+TASK_SIZE = re.compile(r"^(?P<cpu>\d+)x(?P<memory>\d+)$")
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def parse_task_size(name):
+    match = TASK_SIZE.match(name)
+    if match is None:
+        raise ValueError(f"Task size {name} is not <cpu units>x<memory MiB>")
+    cpu, memory = int(match["cpu"]), int(match["memory"])
+
+    if cpu not in FARGATE_MEMORY:
+        raise ValueError(f"Task size {name}: {cpu} is not a Fargate CPU value")
+    minimum, maximum, step = FARGATE_MEMORY[cpu]
+    allowed = memory in (512, 1024, 2048) if step is None else minimum <= memory <= maximum and memory % step == 0
+    if not allowed:
+        raise ValueError(f"Task size {name}: {memory} MiB is not a Fargate memory value for {cpu} CPU units")
+    return cpu, memory
+
+
+def load_csv_points(path):
+    """
+    Return (rps, p99 ms) points of a Locust stats history or an rps,p99Ms CSV file.
+    """
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        return []
+
+    if "rps" in rows[0]:
+        return [(float(row["rps"]), float(row["p99Ms"])) for row in rows]
+
+    # Locust: one row per second, average the aggregated rows of every user count step
+    steps = {}
+    for row in rows:
+        if row.get("Name") != "Aggregated" or row["99%"] in ("", "N/A") or float(row["Requests/s"]) <= 0:
+            continue
+        steps.setdefault(row["User Count"], []).append((float(row["Requests/s"]), float(row["99%"])))
+    return [
+        (sum(rps for rps, _ in samples) / len(samples), sum(p99 for _, p99 in samples) / len(samples))
+        for samples in steps.values()
+    ]
+
+
+def load_curve(config, base_dir):
+    if "csv" in config:
+        points = load_csv_points(os.path.join(base_dir, config["csv"]))
+    else:
+        points = [(float(point["rps"]), float(point["p99Ms"])) for point in config["points"]]
+    return sorted(points)
+
+
+def capacity_at_slo(points, p99_ms):
+    """
+    Return the highest RPS of one task with a p99 latency within the SLO, 0 if none.
+    """
+    capacity = 0.0
+    previous = None
+    for rps, p99 in points:
+        if p99 > p99_ms:
+            if previous is None:
+                return 0.0
+            # Linear interpolation between the last passing and the first failing step
+            previous_rps, previous_p99 = previous
+            return previous_rps + (rps - previous_rps) * (p99_ms - previous_p99) / (p99 - previous_p99)
+        capacity = rps
+        previous = (rps, p99)
+    # NOTE: Every step met the SLO, the throughput beyond the highest tested step is unknown.
+    return capacity
+
+
+def task_price(cpu, memory, prices):
+    vcpu_hour, gb_hour = prices
+    return cpu / 1024 * vcpu_hour + memory / 1024 * gb_hour
+
+
+def plan_environment(environment, config, curves, prices, headroom):
+    """
+    Return the candidates of every task size for an environment, cheapest first.
+    """
+    candidates = []
+    for name, points in curves.items():
+        cpu, memory = parse_task_size(name)
+        capacity = capacity_at_slo(points, config["p99Ms"]) * headroom
+        if capacity <= 0:
+            log(f"{environment}: {name} misses the {config['p99Ms']}ms p99 SLO at every load test step")
+            continue
+
+        desired = max(config.get("minTasks", 1), math.ceil(config.get("baseRps", 0) / capacity))
+        peak = max(desired, math.ceil(config["peakRps"] / capacity))
+        maximum = max(peak, math.ceil(config["peakRps"] * config.get("burstFactor", DEFAULT_BURST_FACTOR) / capacity))
+        price = task_price(cpu, memory, prices)
+        candidates.append({
+            "taskSize": name,
+            "rpsPerTask": capacity,
+            "peakTasks": peak,
+            "peakCostPerHour": peak * price,
+            "monthlyCost": (desired + peak) / 2 * price * HOURS_PER_MONTH,
+            "scaling": {
+                "cpu": cpu,
+                "memory": memory,
+                "desiredCount": desired,
+                "minCapacity": desired,
+                "maxCapacity": maximum,
+                # NOTE: One task at its SLO capacity is assumed CPU bound.
+                "targetCpuPercent": round(headroom * 100),
+            },
+        })
+    return sorted(candidates, key=lambda candidate: (candidate["peakCostPerHour"], candidate["peakTasks"]))
+
+
+def render_scaling(scaling):
+    lines = [f"    scaling: # scripts/capacity_planner.py {date.today().isoformat()}\n"]
+    lines.extend(f"      {key}: {value}\n" for key, value in scaling.items())
+    return lines
+
+
+def block_end(lines, start, indent):
+    """
+    Return the index after the block starting at lines[start], trailing blank lines excluded.
+    """
+    end = start + 1
+    last = start + 1
+    while end < len(lines):
+        stripped = lines[end].strip()
+        if stripped and not stripped.startswith("#"):
+            if len(lines[end]) - len(lines[end].lstrip()) <= indent:
+                break
+        if stripped:
+            last = end + 1
+        end += 1
+    return last
+
+
+def write_scaling(path, environment, scaling):
+    """
+    Replace or add accounts.<environment>.scaling in the parameters file, keeping every other line.
+    """
+    with open(path) as f:
+        lines = f.readlines()
+
+    environment_line = re.compile(rf"""^  ["']?{re.escape(environment)}["']?:\s*(#.*)?$""")
+    accounts = lines.index("accounts:\n")
+    start = next(
+        (index for index in range(accounts + 1, len(lines)) if environment_line.match(lines[index].rstrip("\n"))),
+        None,
+    )
+    if start is None:
+        raise ValueError(f"accounts.{environment} not found in {path}")
+    end = block_end(lines, start, 2)
+
+    scaling_start = next(
+        (index for index in range(start + 1, end) if re.match(r"^    scaling:", lines[index])),
+        None,
+    )
+    if scaling_start is None:
+        lines[end:end] = render_scaling(scaling)
+    else:
+        lines[scaling_start:block_end(lines, scaling_start, 4)] = render_scaling(scaling)
+
+    parameters = yaml.safe_load("".join(lines))
+    if parameters["accounts"][environment]["scaling"] != scaling:
+        raise ValueError(f"accounts.{environment}.scaling could not be written to {path}")
+    with open(path, "w") as f:
+        f.writelines(lines)
+    log(f"Wrote accounts.{environment}.scaling to {path}")
+
+
+def print_candidates(environment, config, candidates):
+    print(f"""{environment}: peak {config["peakRps"]} rps, base {config.get("baseRps", 0)} rps, p99 <= {config["p99Ms"]}ms""")
+    for candidate in candidates:
+        scaling = candidate["scaling"]
+        print(
+            f"""  {candidate["taskSize"]:<12} {candidate["rpsPerTask"]:>8.1f} rps/task"""
+            f"""  tasks {scaling["minCapacity"]}-{candidate["peakTasks"]} (max {scaling["maxCapacity"]})"""
+            f"""  ${candidate["peakCostPerHour"]:.3f}/h at peak  ~${candidate["monthlyCost"]:.0f}/month"""
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("plan", help="capacity plan YAML file")
+    parser.add_argument("--environment", action="append", help="plan only this environment, repeatable")
+    parser.add_argument("--parameters", default=DEFAULT_PARAMETERS_FILE)
+    parser.add_argument("--write", action="store_true", help="write the recommendations into the parameters file")
+    args = parser.parse_args()
+
+    with open(args.plan) as f:
+        plan = yaml.safe_load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(args.plan))
+    curves = {name: load_curve(config, base_dir) for name, config in plan["loadTests"].items()}
+    architecture = plan.get("architecture", "x86")
+    prices = plan.get("prices", {}).get(architecture) or FARGATE_PRICES[plan["region"]][architecture]
+    headroom = plan.get("headroom", DEFAULT_HEADROOM)
+
+    recommendations = {}
+    for environment, config in plan["environments"].items():
+        if args.environment and environment not in args.environment:
+            continue
+        candidates = plan_environment(environment, config, curves, prices, headroom)
+        print_candidates(environment, config, candidates)
+        if not candidates:
+            log(f"{environment}: no tested task size meets the SLO")
+            continue
+        recommendations[environment] = candidates[0]["scaling"]
+
+    print(yaml.safe_dump({"scaling": recommendations}, sort_keys=False))
+    if args.write:
+        for environment, scaling in recommendations.items():
+            write_scaling(args.parameters, environment, scaling)
+
+
+if __name__ == "__main__":
+    main()
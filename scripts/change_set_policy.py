@@ -0,0 +1,244 @@
+"""
+Evaluate CloudFormation change sets against the pipeline's auto-approval policy.
+
+Runs inside the DescribeChangeSet CodeBuild step of CrossAccountDeployPipelineStack.
+The change sets of all given stacks are read concurrently through the CDK lookup
+role of each target account, every enabled rule is evaluated and the decision is
+printed on stdout as shell variable assignments, so the build can export them to
+CodePipeline:
+
+    CHANGE_SET_DECISION=APPROVE|MANUAL
+    CHANGE_SET_SUMMARY='...'
+
+Environment variables:
+
+    CHANGE_SET_STACKS   JSON list of {"stackName", "account", "region"}
+    CHANGE_SET_NAME     Name of the change set created by the pipeline
+    CDK_QUALIFIER       Qualifier of the CDK bootstrap roles
+    CHANGE_SET_POLICY   Optional JSON object of rule name -> rule setting,
+                        without it every change set needs a manual approval
+    CHANGE_SET_REPORT   Optional path of the combined JSON report to write
+"""
+
+import json
+import os
+import shlex
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+APPROVE = "APPROVE"
+MANUAL = "MANUAL"
+
+MAX_CONCURRENT_DESCRIBES = 8
+
+IAM_RESOURCE_TYPE_PREFIX = "AWS::IAM::"
+SECURITY_GROUP_RESOURCE_TYPES = {
+    "AWS::EC2::SecurityGroup",
+    "AWS::EC2::SecurityGroupIngress",
+    "AWS::EC2::SecurityGroupEgress",
+}
+EMPTY_CHANGE_SET_REASONS = (
+    "didn't contain changes",
+    "No updates are to be performed",
+)
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def lookup_role_session(account, region, cdk_qualifier):
+    """
+    Return a boto3 session using the CDK lookup role of the given account.
+    """
+    credentials = boto3.Session().client("sts").assume_role(
+        RoleArn=f"arn:aws:iam::{account}:role/cdk-{cdk_qualifier}-lookup-role-{account}-{region}",
+        RoleSessionName="change-set-policy",
+    )["Credentials"]
+
+    return boto3.Session(
+        aws_access_key_id=credentials["AccessKeyId"],
+        aws_secret_access_key=credentials["SecretAccessKey"],
+        aws_session_token=credentials["SessionToken"],
+        region_name=region,
+    )
+
+
+def describe_change_set(session, stack_name, change_set_name):
+    """
+    Return the resource changes of a change set, following pagination.
+    """
+    cloudformation = session.client("cloudformation")
+    changes = []
+    kwargs = {"StackName": stack_name, "ChangeSetName": change_set_name}
+
+    while True:
+        response = cloudformation.describe_change_set(**kwargs)
+        if response["Status"] == "FAILED":
+            reason = response.get("StatusReason", "")
+            if any(empty in reason for empty in EMPTY_CHANGE_SET_REASONS):
+                return []
+            raise RuntimeError(f"Change set {change_set_name} of {stack_name} failed: {reason}")
+
+        changes.extend(
+            change["ResourceChange"]
+            for change in response.get("Changes", [])
+            if change.get("Type") == "Resource"
+        )
+
+        if "NextToken" not in response:
+            return changes
+        kwargs["NextToken"] = response["NextToken"]
+
+
+def describe_change(change):
+    return f"""{change["Action"]} {change["LogicalResourceId"]} ({change["ResourceType"]})"""
+
+
+def check_no_replacements(changes, setting):
+    # NOTE: A list of resource types allows replacements of those types only,
+    # e.g. AWS::ECS::TaskDefinition which is replaced by every image bump, an empty list none.
+    if setting is None or setting is False:
+        return []
+    replaceable_resource_types = setting if isinstance(setting, list) else []
+    return [
+        describe_change(change)
+        for change in changes
+        if change.get("Replacement") in ("True", "Conditional")
+        and change["ResourceType"] not in replaceable_resource_types
+    ]
+
+
+def check_no_removals(changes, enabled):
+    if not enabled:
+        return []
+    return [describe_change(change) for change in changes if change["Action"] == "Remove"]
+
+
+def check_no_iam_changes(changes, enabled):
+    if not enabled:
+        return []
+    return [
+        describe_change(change)
+        for change in changes
+        if change["ResourceType"].startswith(IAM_RESOURCE_TYPE_PREFIX)
+    ]
+
+
+def check_no_security_group_changes(changes, enabled):
+    if not enabled:
+        return []
+    return [
+        describe_change(change)
+        for change in changes
+        if change["ResourceType"] in SECURITY_GROUP_RESOURCE_TYPES
+    ]
+
+
+def check_allowed_resource_types(changes, allowed_resource_types):
+    if allowed_resource_types is None:
+        return []
+    return [
+        describe_change(change)
+        for change in changes
+        if change["ResourceType"] not in allowed_resource_types
+    ]
+
+
+RULES = {
+    "noReplacements": check_no_replacements,
+    "noRemovals": check_no_removals,
+    "noIamChanges": check_no_iam_changes,
+    "noSecurityGroupChanges": check_no_security_group_changes,
+    "allowedResourceTypes": check_allowed_resource_types,
+}
+
+
+def evaluate(changes, policy):
+    """
+    Evaluate every configured rule and return (decision, passed rules, violations).
+    """
+    passed = []
+    violations = {}
+
+    for rule_name, setting in policy.items():
+        if rule_name not in RULES:
+            raise ValueError(f"Unknown change set policy rule: {rule_name}")
+
+        rule_violations = RULES[rule_name](changes, setting)
+        if rule_violations:
+            violations[rule_name] = rule_violations
+        else:
+            passed.append(rule_name)
+
+    decision = APPROVE if not violations else MANUAL
+    return decision, passed, violations
+
+
+def describe_stack_change_set(stack, change_set_name, cdk_qualifier):
+    session = lookup_role_session(stack["account"], stack["region"], cdk_qualifier)
+    return describe_change_set(session, stack["stackName"], change_set_name)
+
+
+def main():
+    stacks = json.loads(os.environ["CHANGE_SET_STACKS"])
+    change_set_name = os.environ["CHANGE_SET_NAME"]
+    cdk_qualifier = os.environ["CDK_QUALIFIER"]
+    policy = json.loads(os.environ["CHANGE_SET_POLICY"]) if "CHANGE_SET_POLICY" in os.environ else None
+    report_path = os.environ.get("CHANGE_SET_REPORT")
+
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_DESCRIBES, len(stacks))) as executor:
+        stack_changes = list(
+            executor.map(
+                lambda stack: describe_stack_change_set(stack, change_set_name, cdk_qualifier),
+                stacks,
+            )
+        )
+
+    changes = []
+    for stack, changes_of_stack in zip(stacks, stack_changes):
+        log(f"""{stack["stackName"]}: {len(changes_of_stack)} resource change(s)""")
+        for change in changes_of_stack:
+            log(f"  {describe_change(change)} replacement={change.get('Replacement', 'n/a')}")
+        changes.extend(changes_of_stack)
+
+    if policy is not None:
+        decision, passed, violations = evaluate(changes, policy)
+    else:
+        decision, passed, violations = MANUAL, [], {}
+
+    log(f"Decision: {decision}")
+    for rule_name in passed:
+        log(f"  rule {rule_name}: passed")
+    for rule_name, rule_violations in violations.items():
+        log(f"  rule {rule_name}: violated by {', '.join(rule_violations)}")
+
+    if decision == APPROVE:
+        summary = f"Auto-approved by change set policy, matched rules: {', '.join(passed)}"
+    elif policy is None:
+        summary = "Manual approval required, no change set policy configured"
+    else:
+        summary = f"Manual approval required, violated rules: {', '.join(violations)}"
+
+    if report_path:
+        report = {
+            "changeSetName": change_set_name,
+            "stacks": [
+                dict(stack, changes=changes_of_stack)
+                for stack, changes_of_stack in zip(stacks, stack_changes)
+            ],
+            "decision": decision,
+            "passedRules": passed,
+            "violations": violations,
+        }
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+    print(f"CHANGE_SET_DECISION={decision}")
+    print(f"CHANGE_SET_SUMMARY={shlex.quote(summary)}")
+
+
+if __name__ == "__main__":
+    main()
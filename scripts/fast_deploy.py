@@ -0,0 +1,207 @@
+"""
+Deploy a locally built image to a development environment without the pipeline.
+
+Builds the app image from the local working copy, pushes it to the ECR repository of
+ecrStack and registers a new revision of the service's current task definition with
+the new image. The service uses the CodeDeploy deployment controller, so the revision
+is rolled out by a CodeDeploy deployment with an inline AppSpec and
+CodeDeployDefault.ECSAllAtOnce, skipping the workflow pipeline stages and
+CloudFormation. The next pipeline run deploys the pipeline's image again.
+
+Environments refuse this path unless accounts.<env>.allowFastDeploy is true in
+data/parameters.yaml, keep it unset for staging and production.
+
+Run from this repository with credentials of the environment's account (e.g.
+AWS_PROFILE), --app-dir being the app sources holding the Dockerfile and target/web01.war:
+
+    python scripts/fast_deploy.py dev --app-dir ../example-app
+    python scripts/fast_deploy.py dev --app-dir ../example-app --no-wait
+"""
+
+import argparse
+import base64
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import boto3
+import yaml
+
+DEFAULT_PARAMETERS_FILE = "data/parameters.yaml"
+# Same as Constants.SSM_WIRING_PARAMETER_PREFIX
+SSM_WIRING_PARAMETER_PREFIX = "/app-deployment/wiring"
+# Same as appspec.yaml
+CONTAINER_NAME = "web"
+CONTAINER_PORT = 8080
+# Same as Constants.CPU_ARCHITECTURE_PLATFORMS
+CPU_ARCHITECTURE_PLATFORMS = {
+    "X86_64": "linux/amd64",
+    "ARM64": "linux/arm64",
+}
+DEPLOYMENT_CONFIG_NAME = "CodeDeployDefault.ECSAllAtOnce"
+POLL_SECONDS = 10
+
+# Keys of describe_task_definition not accepted by register_task_definition
+READ_ONLY_TASK_DEFINITION_KEYS = (
+    "taskDefinitionArn", "revision", "status", "requiresAttributes", "compatibilities",
+    "registeredAt", "registeredBy", "deregisteredAt",
+)
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def read_value(session, export_name, wiring_mode):
+    """
+    Return a value published by publish_value, as a CloudFormation export or SSM parameter.
+    """
+    if wiring_mode != "exports":
+        ssm = session.client("ssm")
+        return ssm.get_parameter(Name=f"{SSM_WIRING_PARAMETER_PREFIX}/{export_name}")["Parameter"]["Value"]
+
+    paginator = session.client("cloudformation").get_paginator("list_exports")
+    for page in paginator.paginate():
+        for export in page["Exports"]:
+            if export["Name"] == export_name:
+                return export["Value"]
+    raise LookupError(f"Export {export_name} not found")
+
+
+def run(*command, stdin=None):
+    log(f"$ {' '.join(command)}")
+    subprocess.run(command, input=stdin, check=True, text=True)
+
+
+def build_and_push(session, repository_uri, app_dir, image_tag, platform):
+    token = session.client("ecr").get_authorization_token()["authorizationData"][0]
+    username, password = base64.b64decode(token["authorizationToken"]).decode().split(":", 1)
+    registry = repository_uri.split("/", 1)[0]
+
+    run("docker", "login", "--username", username, "--password-stdin", registry, stdin=password)
+    run("docker", "build", "--platform", platform, "-t", f"{repository_uri}:{image_tag}", app_dir)
+    run("docker", "push", f"{repository_uri}:{image_tag}")
+
+
+def register_task_definition(ecs, task_definition_arn, image):
+    """
+    Register a copy of the task definition with the image of the app container replaced.
+    """
+    task_definition = ecs.describe_task_definition(taskDefinition=task_definition_arn)["taskDefinition"]
+    for key in READ_ONLY_TASK_DEFINITION_KEYS:
+        task_definition.pop(key, None)
+    for container in task_definition["containerDefinitions"]:
+        if container["name"] == CONTAINER_NAME:
+            container["image"] = image
+
+    return ecs.register_task_definition(**task_definition)["taskDefinition"]["taskDefinitionArn"]
+
+
+def find_deployment_group(codedeploy, cluster_arn, service_name):
+    """
+    Return (application name, deployment group name) deploying the ECS service.
+    """
+    cluster_name = cluster_arn.rsplit("/", 1)[-1]
+    for page in codedeploy.get_paginator("list_applications").paginate():
+        for application in page["applications"]:
+            group_names = []
+            for groups_page in codedeploy.get_paginator("list_deployment_groups").paginate(applicationName=application):
+                group_names.extend(groups_page["deploymentGroups"])
+            if not group_names:
+                continue
+            groups = codedeploy.batch_get_deployment_groups(
+                applicationName=application, deploymentGroupNames=group_names,
+            )["deploymentGroupsInfo"]
+            for group in groups:
+                for service in group.get("ecsServices", []):
+                    if service["serviceName"] == service_name and service["clusterName"] == cluster_name:
+                        return application, group["deploymentGroupName"]
+    raise LookupError(f"No CodeDeploy deployment group deploys {service_name}")
+
+
+def create_deployment(codedeploy, application, deployment_group, task_definition_arn):
+    appspec = {
+        "version": 0.0,
+        "Resources": [{
+            "TargetService": {
+                "Type": "AWS::ECS::Service",
+                "Properties": {
+                    "TaskDefinition": task_definition_arn,
+                    "LoadBalancerInfo": {"ContainerName": CONTAINER_NAME, "ContainerPort": CONTAINER_PORT},
+                },
+            },
+        }],
+    }
+    return codedeploy.create_deployment(
+        applicationName=application,
+        deploymentGroupName=deployment_group,
+        deploymentConfigName=DEPLOYMENT_CONFIG_NAME,
+        description="fast_deploy.py",
+        revision={
+            "revisionType": "AppSpecContent",
+            "appSpecContent": {"content": json.dumps(appspec)},
+        },
+    )["deploymentId"]
+
+
+def wait_for_deployment(codedeploy, deployment_id):
+    status = None
+    while status not in ("Succeeded", "Failed", "Stopped"):
+        time.sleep(POLL_SECONDS)
+        info = codedeploy.get_deployment(deploymentId=deployment_id)["deploymentInfo"]
+        if info["status"] != status:
+            status = info["status"]
+            log(f"{deployment_id}: {status}")
+    return status == "Succeeded"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("environment", help="deploy environment of accounts in the parameters file")
+    parser.add_argument("--region", help="default: the first region of the parameters file")
+    parser.add_argument("--app-dir", default=".", help="docker build context of the app")
+    parser.add_argument("--tag", help="image tag, default fast-<UTC timestamp>")
+    parser.add_argument("--parameters", default=DEFAULT_PARAMETERS_FILE)
+    parser.add_argument("--no-wait", action="store_true", help="do not wait for the CodeDeploy deployment")
+    args = parser.parse_args()
+
+    with open(args.parameters) as f:
+        param = yaml.safe_load(f)
+    env_config = param["accounts"].get(args.environment)
+    if env_config is None:
+        log(f"Unknown environment {args.environment}")
+        sys.exit(2)
+    if not env_config.get("allowFastDeploy", False):
+        log(f"Refusing to fast deploy {args.environment}: accounts.{args.environment}.allowFastDeploy is not true, deploy through the pipeline")
+        sys.exit(1)
+
+    app_config = param["appConfig"]
+    wiring_mode = app_config.get("wiringMode", "exports")
+    session = boto3.Session(region_name=args.region or param["regions"][0]["region"])
+    ecs = session.client("ecs")
+    codedeploy = session.client("codedeploy")
+
+    repository_uri = read_value(session, "repository-uri-repository-account", wiring_mode)
+    cluster_arn = read_value(session, f"ECS-cluster-{args.environment}", wiring_mode)
+    service_name = f"ECS-Service-{args.environment}"
+
+    image_tag = args.tag or f"fast-{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+    platform = CPU_ARCHITECTURE_PLATFORMS[env_config.get("cpuArchitecture", "X86_64")]
+    build_and_push(session, repository_uri, args.app_dir, image_tag, platform)
+
+    service = ecs.describe_services(cluster=cluster_arn, services=[service_name])["services"][0]
+    task_definition_arn = register_task_definition(ecs, service["taskDefinition"], f"{repository_uri}:{image_tag}")
+    log(f"Registered {task_definition_arn}")
+
+    application, deployment_group = find_deployment_group(codedeploy, cluster_arn, service_name)
+    deployment_id = create_deployment(codedeploy, application, deployment_group, task_definition_arn)
+    log(f"Started CodeDeploy deployment {deployment_id} of {application}/{deployment_group}")
+
+    if not args.no_wait and not wait_for_deployment(codedeploy, deployment_id):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
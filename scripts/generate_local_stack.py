@@ -0,0 +1,148 @@
+"""
+Generate a docker-compose stand-in of an environment's ECS service and ALB.
+
+The app container gets the CPU and memory of the Fargate task (accounts.<env>.scaling,
+as sized by ecsClusterStack) as cgroup limits, without swap, and the port of
+taskdef.json. It runs behind HAProxy configured like the ALB: HTTP health checks
+with the path, interval, timeout, thresholds and matcher of the target groups, and
+the ALB idle timeout. The intergrationTests dependencies of appConfig (e.g. the
+session cache stand-in) run next to it, so single-task throughput can be measured
+on a laptop or CI box, e.g. with the load tests against http://localhost:8000.
+
+Run from the repository root:
+
+    python -m scripts.generate_local_stack dev --image <repository uri>:<tag>
+    python -m scripts.generate_local_stack production --app-dir ../example-app --output local-stack
+    docker compose -f local-stack/docker-compose.yml up
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import yaml
+
+from stacks.data import load_parameters
+from utils.constants import Constants
+from utils.functions_common import get_scaling_config
+
+DEFAULT_OUTPUT_DIR = "local-stack"
+DEFAULT_LISTENER_PORT = 8000
+TASK_DEFINITION_FILE = "data/app-sources/taskdef.json"
+HAPROXY_IMAGE = "public.ecr.aws/docker/library/haproxy:2.8"
+HAPROXY_CONFIG_FILE = "haproxy.cfg"
+COMPOSE_FILE = "docker-compose.yml"
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def container_port(task_definition):
+    """
+    Return the container port of the app container of taskdef.json.
+    """
+    for container in task_definition["containerDefinitions"]:
+        if container["name"] == Constants.CONTAINER_NAME:
+            return container["portMappings"][0]["containerPort"]
+    raise LookupError(f"Container {Constants.CONTAINER_NAME} not found in {TASK_DEFINITION_FILE}")
+
+
+def render_haproxy_config(app_name, port):
+    healthy_codes = "|".join(Constants.HEALTH_CHECK_HEALTHY_HTTP_CODES.split(","))
+    health_check_path = Constants.HEALTH_CHECK_PATH.format(app_name=app_name)
+    return f"""# Generated by scripts/generate_local_stack.py, mimics the ALB and its target group
+global
+    maxconn 4096
+
+defaults
+    mode http
+    timeout connect 5s
+    timeout client {Constants.ALB_IDLE_TIMEOUT_SECONDS}s
+    timeout server {Constants.ALB_IDLE_TIMEOUT_SECONDS}s
+    option http-keep-alive
+    option forwardfor
+
+frontend http
+    bind :80
+    default_backend app
+
+backend app
+    option httpchk GET {health_check_path}
+    http-check expect rstatus ^({healthy_codes})$
+    default-server inter {Constants.HEALTH_CHECK_INTERVAL_SECONDS}s rise {Constants.HEALTH_CHECK_HEALTHY_THRESHOLD} fall {Constants.HEALTH_CHECK_UNHEALTHY_THRESHOLD} init-addr last,libc,none
+    timeout check {Constants.HEALTH_CHECK_TIMEOUT_SECONDS}s
+    server {Constants.CONTAINER_NAME} {Constants.CONTAINER_NAME}:{port} check
+"""
+
+
+def render_compose(app_config, scaling, cpu_architecture, port, image, app_dir, listener_port):
+    intergration_config = app_config.get("intergrationTests", {})
+
+    app = {"image": image} if image else {"build": os.path.abspath(app_dir)}
+    app.update({
+        "platform": Constants.CPU_ARCHITECTURE_PLATFORMS[cpu_architecture],
+        "environment": {str(name): str(value) for name, value in intergration_config.get("appEnvironment", {}).items()},
+        "expose": [str(port)],
+        # Fargate task size as cgroup limits, Fargate tasks have no swap
+        "cpus": scaling["cpu"] / 1024,
+        "mem_limit": f"""{scaling["memory"]}m""",
+        "memswap_limit": f"""{scaling["memory"]}m""",
+    })
+
+    services = {}
+    for dependency in intergration_config.get("dependencies", []):
+        services[dependency["name"]] = {
+            "image": dependency["image"],
+            "environment": {str(name): str(value) for name, value in dependency.get("environment", {}).items()},
+        }
+    if services:
+        app["depends_on"] = list(services)
+    services[Constants.CONTAINER_NAME] = app
+    services["alb"] = {
+        "image": HAPROXY_IMAGE,
+        "ports": [f"{listener_port}:80"],
+        "volumes": [f"./{HAPROXY_CONFIG_FILE}:/usr/local/etc/haproxy/haproxy.cfg:ro"],
+        "depends_on": [Constants.CONTAINER_NAME],
+    }
+    return {"services": services}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("environment", help="deploy environment of accounts in data/parameters.yaml")
+    parser.add_argument("--image", help="app image, default: built from --app-dir")
+    parser.add_argument("--app-dir", default=".", help="docker build context of the app")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--listener-port", type=int, default=DEFAULT_LISTENER_PORT, help="host port of the ALB stand-in")
+    args = parser.parse_args()
+
+    param = load_parameters()
+    env_config = param["accounts"].get(args.environment)
+    if env_config is None or "cidr" not in env_config:
+        log(f"Unknown deploy environment {args.environment}")
+        sys.exit(2)
+
+    app_config = param["appConfig"]
+    scaling = get_scaling_config(env_config)
+    cpu_architecture = env_config.get("cpuArchitecture", Constants.DEFAULT_CPU_ARCHITECTURE)
+    with open(TASK_DEFINITION_FILE) as f:
+        port = container_port(json.load(f))
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, HAPROXY_CONFIG_FILE), "w") as f:
+        f.write(render_haproxy_config(app_config["appName"], port))
+    with open(os.path.join(args.output, COMPOSE_FILE), "w") as f:
+        f.write("# Generated by scripts/generate_local_stack.py\n")
+        yaml.safe_dump(
+            render_compose(app_config, scaling, cpu_architecture, port, args.image, args.app_dir, args.listener_port),
+            f, sort_keys=False,
+        )
+
+    log(f"""{args.environment}: {scaling["cpu"]} CPU units, {scaling["memory"]} MiB, {cpu_architecture}, port {port}""")
+    log(f"Written to {args.output}, run: docker compose -f {os.path.join(args.output, COMPOSE_FILE)} up")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Measure Fargate task startup of an environment's ECS service, e.g. before/after SOCI.
+
+Runs standalone tasks with the service's current task definition and network
+configuration, waits until they are RUNNING, stops them and reports per task:
+
+    pull     image pull time (pullStartedAt -> pullStoppedAt)
+    start    provisioning to running (createdAt -> startedAt)
+
+Save a run before enabling appConfig.soci and one after the next image build, then
+compare them. Run with credentials of the environment's account (e.g. AWS_PROFILE):
+
+    python scripts/measure_task_startup.py run dev --tasks 5 --json before.json
+    python scripts/measure_task_startup.py run dev --tasks 5 --json after.json
+    python scripts/measure_task_startup.py compare before.json after.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+
+import boto3
+
+MAX_TASKS_PER_RUN_TASK = 10
+# run_task calls without any started task before giving up, e.g. on capacity or subnet errors
+MAX_RUN_TASK_ATTEMPTS = 3
+METRICS = {
+    "pull": ("pullStartedAt", "pullStoppedAt"),
+    "start": ("createdAt", "startedAt"),
+}
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def find_service(ecs, service_name):
+    """
+    Return (cluster ARN, deployment) of the active service with the given name.
+    """
+    for page in ecs.get_paginator("list_clusters").paginate():
+        for cluster_arn in page["clusterArns"]:
+            for service in ecs.describe_services(cluster=cluster_arn, services=[service_name])["services"]:
+                if service["status"] == "ACTIVE":
+                    # NOTE: CodeDeploy deploys task sets, the primary one runs the deployed image.
+                    primary = [task_set for task_set in service.get("taskSets", []) if task_set["status"] == "PRIMARY"]
+                    return cluster_arn, primary[0] if primary else service
+    raise LookupError(f"Service {service_name} not found")
+
+
+def run_tasks(ecs, cluster_arn, deployment, count):
+    """
+    Start count tasks like the service does, wait until they run and return their descriptions.
+    """
+    task_arns = []
+    failures = []
+    attempts = 0
+    try:
+        while len(task_arns) < count:
+            if attempts == MAX_RUN_TASK_ATTEMPTS:
+                reasons = sorted(set(failure.get("reason", "unknown") for failure in failures))
+                raise RuntimeError(
+                    f"Started {len(task_arns)} of {count} task(s), {attempts} run_task call(s) in a row"
+                    f" started none: {', '.join(reasons)}"
+                )
+            response = ecs.run_task(
+                cluster=cluster_arn,
+                taskDefinition=deployment["taskDefinition"],
+                launchType="FARGATE",
+                networkConfiguration=deployment["networkConfiguration"],
+                count=min(count - len(task_arns), MAX_TASKS_PER_RUN_TASK),
+                startedBy="measure_task_startup",
+            )
+            for failure in response["failures"]:
+                log(f"run_task failure: {failure}")
+            failures.extend(response["failures"])
+            # NOTE: Only calls starting no task count as failed attempts, partial starts make progress.
+            attempts = 0 if response["tasks"] else attempts + 1
+            task_arns.extend(task["taskArn"] for task in response["tasks"])
+        log(f"Started {len(task_arns)} task(s) of {deployment['taskDefinition']}")
+
+        ecs.get_waiter("tasks_running").wait(cluster=cluster_arn, tasks=task_arns)
+        return ecs.describe_tasks(cluster=cluster_arn, tasks=task_arns)["tasks"]
+    finally:
+        for task_arn in task_arns:
+            ecs.stop_task(cluster=cluster_arn, task=task_arn, reason="measure_task_startup")
+
+
+def task_timings(task):
+    return {
+        metric: (task[end] - task[start]).total_seconds()
+        for metric, (start, end) in METRICS.items()
+        if start in task and end in task
+    }
+
+
+def summarize(timings):
+    summary = {}
+    for metric in METRICS:
+        values = sorted(timing[metric] for timing in timings if metric in timing)
+        if values:
+            summary[metric] = {
+                "median": statistics.median(values),
+                "max": values[-1],
+                "count": len(values),
+            }
+    return summary
+
+
+def run(args):
+    session = boto3.Session(region_name=args.region)
+    ecs = session.client("ecs")
+    cluster_arn, deployment = find_service(ecs, f"ECS-Service-{args.environment}")
+
+    timings = [task_timings(task) for task in run_tasks(ecs, cluster_arn, deployment, args.tasks)]
+    report = {
+        "environment": args.environment,
+        "taskDefinition": deployment["taskDefinition"],
+        "tasks": timings,
+        "summary": summarize(timings),
+    }
+    for metric, summary in report["summary"].items():
+        print(f"""{metric:<6} median {summary["median"]:.1f}s  max {summary["max"]:.1f}s  ({summary["count"]} task(s))""")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def compare(args):
+    with open(args.before) as f:
+        before = json.load(f)["summary"]
+    with open(args.after) as f:
+        after = json.load(f)["summary"]
+
+    for metric in METRICS:
+        if metric not in before or metric not in after:
+            continue
+        old, new = before[metric]["median"], after[metric]["median"]
+        change = (new - old) / old * 100 if old else 0
+        print(f"{metric:<6} median {old:.1f}s -> {new:.1f}s ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run tasks and measure their startup")
+    run_parser.add_argument("environment", help="deploy environment of accounts in data/parameters.yaml")
+    run_parser.add_argument("--region")
+    run_parser.add_argument("--tasks", type=int, default=5)
+    run_parser.add_argument("--json", help="also write the timings as JSON to this path")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON reports")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Split unit test classes into shards balanced by historical duration.
+
+Runs inside every build of the Build-unittest batch build of workflowPipelineStack,
+and in the unit-test-timings action after it, downloaded from its S3 asset. Commands:
+
+    select  Print the comma separated test classes of SHARD_INDEX, for mvn -Dtest=
+    record  Write the durations of the test classes run by this shard, read from the
+            surefire XML reports, to TIMINGS_OUTPUT
+    merge   Write the shard-*.json files of a completed batch below TIMINGS_DIR as one
+            timings file to TIMINGS_OUTPUT
+
+Test classes are assigned longest first to the shard with the lowest total duration.
+Classes without a recorded duration get the median of the known ones, so new tests
+spread evenly. Every shard computes the same assignment from the same timings: the
+timings file is only replaced by the merge of a completed batch, after the shards ran,
+and holds the classes of that run only.
+
+Environment variables:
+
+    SHARD_INDEX         Index of this shard, from 0
+    SHARD_COUNT         Number of shards
+    TIMINGS_FILE        Timings of the last completed run, may be missing (select)
+    TEST_SOURCES_DIR    Optional test sources directory, default src/test/java
+    REPORTS_DIR         Optional surefire reports directory, default target/surefire-reports
+    TIMINGS_DIR         Directory of the shard-*.json files of the batch, searched recursively (merge)
+    TIMINGS_OUTPUT      Path of the timings file to write (record, merge)
+"""
+
+import glob
+import json
+import os
+import statistics
+import sys
+import xml.etree.ElementTree as ElementTree
+
+DEFAULT_TEST_SOURCES_DIR = "src/test/java"
+DEFAULT_REPORTS_DIR = "target/surefire-reports"
+DEFAULT_DURATION_SECONDS = 1.0
+TEST_CLASS_SUFFIXES = ("Test.java", "Tests.java", "IT.java")
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def find_test_classes(sources_dir):
+    """
+    Return the fully qualified names of the test classes below the sources directory.
+    """
+    classes = []
+    for path in glob.glob(os.path.join(sources_dir, "**", "*.java"), recursive=True):
+        if path.endswith(TEST_CLASS_SUFFIXES):
+            relative_path = os.path.relpath(path, sources_dir)
+            classes.append(relative_path[: -len(".java")].replace(os.sep, "."))
+    return sorted(classes)
+
+
+def load_timings(timings_file):
+    """
+    Return the test class durations of the timings file, none if it does not exist yet.
+    """
+    if not os.path.exists(timings_file):
+        return {}
+    with open(timings_file) as f:
+        return json.load(f)
+
+
+def write_timings(timings):
+    with open(os.environ["TIMINGS_OUTPUT"], "w") as f:
+        json.dump(timings, f, indent=2, sort_keys=True)
+
+
+def assign_shards(classes, timings, shard_count):
+    """
+    Return a list of (total duration, test classes) per shard.
+    """
+    known = [timings[name] for name in classes if name in timings]
+    default_duration = statistics.median(known) if known else DEFAULT_DURATION_SECONDS
+    durations = {name: timings.get(name, default_duration) for name in classes}
+
+    shards = [(0.0, []) for _ in range(shard_count)]
+    for name in sorted(classes, key=lambda name: (-durations[name], name)):
+        index = min(range(shard_count), key=lambda index: shards[index][0])
+        total, names = shards[index]
+        shards[index] = (total + durations[name], names + [name])
+    return shards
+
+
+def select():
+    shard_index = int(os.environ["SHARD_INDEX"])
+    shard_count = int(os.environ["SHARD_COUNT"])
+    classes = find_test_classes(os.environ.get("TEST_SOURCES_DIR", DEFAULT_TEST_SOURCES_DIR))
+    timings = load_timings(os.environ["TIMINGS_FILE"])
+
+    shards = assign_shards(classes, timings, shard_count)
+    for index, (total, names) in enumerate(shards):
+        log(f"shard {index}: {len(names)} class(es), {total:.1f}s expected")
+
+    print(",".join(shards[shard_index][1]))
+
+
+def record():
+    timings = {}
+    reports_dir = os.environ.get("REPORTS_DIR", DEFAULT_REPORTS_DIR)
+    for path in glob.glob(os.path.join(reports_dir, "TEST-*.xml")):
+        suite = ElementTree.parse(path).getroot()
+        timings[suite.get("name")] = float(suite.get("time", 0))
+
+    write_timings(timings)
+    log(f"Recorded {len(timings)} test class duration(s)")
+
+
+def merge():
+    # NOTE: Combined batch artifacts hold the files of each build in a directory of its own.
+    paths = sorted(glob.glob(os.path.join(os.environ["TIMINGS_DIR"], "**", "shard-*.json"), recursive=True))
+    timings = {}
+    for path in paths:
+        with open(path) as f:
+            timings.update(json.load(f))
+
+    write_timings(timings)
+    log(f"Merged {len(timings)} test class duration(s) of {len(paths)} shard(s)")
+
+
+COMMANDS = {
+    "select": select,
+    "record": record,
+    "merge": merge,
+}
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in COMMANDS:
+        log(f"usage: {sys.argv[0]} {'|'.join(COMMANDS)}")
+        sys.exit(2)
+    COMMANDS[sys.argv[1]]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from aws_cdk import (
+    Environment,
+    Stack,
+    CfnOutput,
+    Duration,
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
+    aws_elasticloadbalancingv2 as elb,
+)
+from constructs import Construct
+from typing import Dict
+from utils.functions_common import create_resource_name
+
+
+class cloudFrontStack(Stack):
+
+    # Define cache policy for a cached path pattern
+    def create_cache_policy(self, index, behavior, compress, resource_name_prefixs):
+        ttl = Duration.seconds(behavior.get("ttlSeconds", 86400))
+        return cloudfront.CachePolicy(
+            self,
+            f"CachePolicy{index}",
+            cache_policy_name=create_resource_name(f"cache-{index}",
+                                                   resource_name_prefixs["environment"],
+                                                   resource_name_prefixs["region"]),
+            default_ttl=ttl,
+            max_ttl=Duration.seconds(max(ttl.to_seconds(), behavior.get("maxTtlSeconds", 0))),
+            min_ttl=Duration.seconds(0),
+            query_string_behavior=cloudfront.CacheQueryStringBehavior.all()
+            if behavior.get("forwardQueryStrings", False) else cloudfront.CacheQueryStringBehavior.none(),
+            enable_accept_encoding_gzip=compress,
+            enable_accept_encoding_brotli=compress,
+        )
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        resource_name_prefixs,
+        *,
+        env: Environment,
+        alb: elb.IApplicationLoadBalancer,
+        cdn_config: Dict,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, env=env, **kwargs)
+
+        compress = cdn_config.get("compress", True)
+
+        # ALB origin, keep-alive connections are reused between CloudFront and the ALB
+        origin = origins.LoadBalancerV2Origin(
+            alb,
+            protocol_policy=cloudfront.OriginProtocolPolicy.HTTP_ONLY,
+            keepalive_timeout=Duration.seconds(cdn_config.get("originKeepaliveSeconds", 5)),
+            read_timeout=Duration.seconds(cdn_config.get("originReadTimeoutSeconds", 30)),
+        )
+
+        # Cached path patterns (e.g. static assets) with long TTLs
+        additional_behaviors = {}
+        for index, behavior in enumerate(cdn_config.get("cacheBehaviors", [])):
+            additional_behaviors[behavior["pathPattern"]] = cloudfront.BehaviorOptions(
+                origin=origin,
+                viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                cache_policy=self.create_cache_policy(index, behavior, compress, resource_name_prefixs),
+                compress=compress,
+            )
+
+        # Dynamic paths pass through to the ALB uncached with all viewer headers, cookies and query strings
+        self.distribution = cloudfront.Distribution(
+            self, "Distribution",
+            comment=create_resource_name("CDN",
+                                         resource_name_prefixs["environment"],
+                                         resource_name_prefixs["region"]),
+            default_behavior=cloudfront.BehaviorOptions(
+                origin=origin,
+                viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL,
+                cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
+                origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER,
+                compress=compress,
+            ),
+            additional_behaviors=additional_behaviors,
+            price_class=cloudfront.PriceClass[cdn_config.get("priceClass", "PRICE_CLASS_100")],
+            http_version=cloudfront.HttpVersion.HTTP2_AND_3,
+        )
+
+        CfnOutput(self, "Output",
+                  value=f"""https://{self.distribution.distribution_domain_name}""")
@@ -2,24 +2,38 @@ from __future__ import annotations
 
 from aws_cdk import (
     DefaultStackSynthesizer,
+    Duration,
     Environment,
     FeatureFlags,
+    IgnoreMode,
+    RemovalPolicy,
     Stack,
     Stage,
     Tags,
+    aws_codebuild as codebuild,
     aws_codecommit as codecommit,
     aws_codepipeline as codepipeline,
     aws_codepipeline_actions as codepipeline_actions,
+    aws_events as events,
+    aws_events_targets as events_targets,
     aws_iam as iam,
+    aws_lambda as lambdaFunc,
+    aws_s3 as s3,
     pipelines,
 )
 from constructs import Construct
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence, cast
+from typing import Any, Dict, List, Mapping, Optional, Sequence, cast
 
 import cdk_nag
 import dataclasses
 import jsii
+import json
+
+from utils.functions_common import compute_files_hash
+from utils.performance_checks import CONTEXT_KEY as PERFORMANCE_CHECKS_CONTEXT_KEY
+from utils.performance_checks import MODES as PERFORMANCE_CHECKS_MODES
+from utils.performance_checks import PerformanceChecks
 
 __all__ = ["CrossAccountDeployPipelines"]
 
@@ -39,17 +53,53 @@ DEFAULT_DEPLOY_CDK_QUALIFIER = "hnb659fds"
 DEFAULT_PIPELINE_CDK_QUALIFIER = "hnb659fds"
 DEFAULT_CDK_CLI_VERSION = "latest"
 DEFAULT_PIP_INSTALL_ARGS = "-r requirements.txt"
+DEFAULT_SYNTH_IMAGE_CDK_CLI_VERSION = "2.146.0"
+
+SYNTH_IMAGE_DOCKERFILE = "data/synth-image/Dockerfile"
+SYNTH_IMAGE_REQUIREMENTS_FILES = ["requirements.txt"]
+# Docker context of the synth image: only the Dockerfile, its parent directories and the requirements files
+SYNTH_IMAGE_CONTEXT_EXCLUDES = [
+    "**", ".*",
+    "!data", "!data/synth-image", f"!{SYNTH_IMAGE_DOCKERFILE}",
+    *(f"!{path}" for path in SYNTH_IMAGE_REQUIREMENTS_FILES),
+]
+
+CODEBUILD_CACHE_MODE_LOCAL = "local"
+CODEBUILD_CACHE_MODE_S3 = "s3"
+CODEBUILD_CACHE_PATHS = ["/root/.npm/**/*", "/root/.cache/pip/**/*"]
+CODEBUILD_CACHE_EXPIRATION_DAYS = 30
 
 PIPELINE_SOURCE_REPOSITORY_BRANCH_PREFIX = "deploy/"
 CI_SUPPORT_TOOLS_REPOSITORY_NAME = "ci-support-scripts-repository"
 CI_SUPPORT_TOOLS_REPOSITORY_BRANCH = "deploy/support"
 
+CONSOLIDATED_META_PIPELINE_TARGET_ENVIRONMENT_NAME = "all"
+
 CANARY_WAVE_NAME = "Canary"
 DEPLOY_WAVE_NAME = "Deploy"
 APPROVE_CDK_DIFF_ACTION_ID = "ApproveCdkDiff"
 DESCRIBE_CHANGE_SET_ACTION_ID = "DescribeChangeSet"
 APPROVE_CHANGE_SET_ACTION_ID = "ApproveChangeSet"
 
+CHANGE_SET_NAME = "PipelineChange"
+CHANGE_SET_POLICY_SCRIPT = "scripts/change_set_policy.py"
+CHANGE_SET_REPORT_FILE = "change_sets_report.json"
+CHANGE_SET_POLICY_RULES = [
+    "noReplacements",
+    "noRemovals",
+    "noIamChanges",
+    "noSecurityGroupChanges",
+    "allowedResourceTypes",
+]
+CHANGE_SET_DECISION_VARIABLE = "CHANGE_SET_DECISION"
+CHANGE_SET_SUMMARY_VARIABLE = "CHANGE_SET_SUMMARY"
+
+CANARY_BAKE_ACTION_ID = "BakeCanary"
+CANARY_BAKE_SCRIPT = "scripts/canary_bake.py"
+CANARY_METRIC_OUTPUTS_ATTRIBUTE = "canary_metric_outputs"
+DEFAULT_CANARY_BAKE_TIME_MINUTES = 15
+CANARY_BAKE_TIMEOUT_MARGIN_MINUTES = 15
+
 
 @dataclass
 class PipelineCommonConfig:
@@ -63,6 +113,12 @@ class PipelineCommonConfig:
     pipeline_env: Environment
     pipeline_region_name: str
     pipeline_cdk_qualifier: str
+    change_set_approval_policy: Optional[Mapping[str, Any]]
+    use_prebuilt_synth_image: bool
+    codebuild_cache_mode: Optional[str]
+    batch_describe_change_sets: bool
+    canary_bake_config: Optional[Mapping[str, Any]]
+    performance_checks_mode: Optional[str]
 
 
 @dataclass
@@ -73,7 +129,7 @@ class PipelineConfig:
     repository_name: str
     repository_branch: str
     canary_stages: Sequence[Stage]
-    deploy_stages: Sequence[Stage]
+    deploy_waves: Sequence[Sequence[Stage]]
     enable_pipeline_self_diff_check: bool
 
 
@@ -94,15 +150,36 @@ class CrossAccountDeployPipelines:
         pipeline_region_name_override: Optional[str] = None,
         pipeline_cdk_qualifier: str = DEFAULT_PIPELINE_CDK_QUALIFIER,
         create_meta_pipelines: bool = True,
+        change_set_approval_policy: Optional[Mapping[str, Any]] = None,
+        use_prebuilt_synth_image: bool = False,
+        codebuild_cache_mode: Optional[str] = None,
+        batch_describe_change_sets: bool = False,
+        consolidate_meta_pipelines: bool = False,
+        canary_bake_config: Optional[Mapping[str, Any]] = None,
+        performance_checks_mode: Optional[str] = None,
     ):
        
         assert pipeline_env.region is not None 
 
+        if change_set_approval_policy is not None:
+            if len(change_set_approval_policy) == 0:
+                raise ValueError("The change set approval policy has no rules")
+            for rule_name in change_set_approval_policy:
+                if rule_name not in CHANGE_SET_POLICY_RULES:
+                    raise ValueError(f"Unknown change set approval policy rule: {rule_name}")
+
+        if codebuild_cache_mode not in (None, CODEBUILD_CACHE_MODE_LOCAL, CODEBUILD_CACHE_MODE_S3):
+            raise ValueError(f"Unknown CodeBuild cache mode: {codebuild_cache_mode}")
+
+        if performance_checks_mode not in (None, *PERFORMANCE_CHECKS_MODES):
+            raise ValueError(f"Unknown performance checks mode: {performance_checks_mode}")
+
         self.stages: Dict[str, CrossAccountDeployPipelineStage] = {}
         self.meta_stages: Dict[str, CrossAccountDeployPipelineStage] = {}
 
         self.scope = scope
         self.create_meta_pipelines = create_meta_pipelines
+        self.consolidate_meta_pipelines = consolidate_meta_pipelines
 
         self.config = PipelineCommonConfig(
             app_name=app_name,
@@ -117,6 +194,12 @@ class CrossAccountDeployPipelines:
             pipeline_env=pipeline_env,
             pipeline_region_name=pipeline_region_name_override or pipeline_env.region,
             pipeline_cdk_qualifier=pipeline_cdk_qualifier,
+            change_set_approval_policy=change_set_approval_policy,
+            use_prebuilt_synth_image=use_prebuilt_synth_image,
+            codebuild_cache_mode=codebuild_cache_mode,
+            batch_describe_change_sets=batch_describe_change_sets,
+            canary_bake_config=canary_bake_config,
+            performance_checks_mode=performance_checks_mode,
         )
 
     def add_target_environment(
@@ -125,6 +208,7 @@ class CrossAccountDeployPipelines:
         *,
         canary_stages: Sequence[Stage] = [],
         deploy_stages: Sequence[Stage],
+        additional_deploy_waves: Sequence[Sequence[Stage]] = [],
         pipeline_stage_name_override: Optional[str] = None,
         pipeline_stack_name_override: Optional[str] = None,
         pipeline_name_override: Optional[str] = None,
@@ -136,7 +220,8 @@ class CrossAccountDeployPipelines:
         if target_environment_name in self.stages:
             raise ValueError("The specified target environment already exists")
 
-        if len(canary_stages) == 0 and len(deploy_stages) == 0:
+        deploy_waves = [deploy_stages, *additional_deploy_waves]
+        if len(canary_stages) == 0 and all(len(wave) == 0 for wave in deploy_waves):
             raise ValueError("No stages are provided")
 
         if self.config.project_name is not None:
@@ -166,7 +251,7 @@ class CrossAccountDeployPipelines:
             repository_name=repository_name,
             repository_branch=repository_branch,
             canary_stages=canary_stages,
-            deploy_stages=deploy_stages,
+            deploy_waves=deploy_waves,
             enable_pipeline_self_diff_check=enable_pipeline_self_diff_check,
         )
 
@@ -179,7 +264,7 @@ class CrossAccountDeployPipelines:
 
         self.stages[target_environment_name] = pipeline_stage
 
-        if self.create_meta_pipelines:
+        if self.create_meta_pipelines and not self.consolidate_meta_pipelines:
 
             meta_config = PipelineConfig(
                 common=dataclasses.replace(
@@ -191,7 +276,7 @@ class CrossAccountDeployPipelines:
                 repository_name=repository_name,
                 repository_branch=repository_branch,
                 canary_stages=[],
-                deploy_stages=[pipeline_stage],
+                deploy_waves=[[pipeline_stage]],
                 enable_pipeline_self_diff_check=enable_pipeline_self_diff_check,
             )
 
@@ -206,6 +291,73 @@ class CrossAccountDeployPipelines:
 
         return pipeline_stage
 
+    def add_consolidated_meta_pipeline(
+        self,
+        *,
+        pipeline_stage_name_override: Optional[str] = None,
+        pipeline_stack_name_override: Optional[str] = None,
+        pipeline_name_override: Optional[str] = None,
+        repository_name_override: Optional[str] = None,
+        enable_pipeline_self_diff_check: bool = True,
+    ) -> CrossAccountDeployPipelineStage:
+        """
+        Creates a single meta-pipeline deploying the pipelines of all target environments
+        added so far in parallel, so the app is synthesized once per change.
+        """
+
+        if not self.create_meta_pipelines or not self.consolidate_meta_pipelines:
+            raise ValueError("Consolidated meta-pipelines are not enabled")
+
+        if CONSOLIDATED_META_PIPELINE_TARGET_ENVIRONMENT_NAME in self.meta_stages:
+            raise ValueError("The consolidated meta-pipeline already exists")
+
+        if len(self.stages) == 0:
+            raise ValueError("No target environments are added")
+
+        if self.config.project_name is not None:
+            app_qualified_name = f"{self.config.app_name}-{self.config.project_name}-{self.config.pipeline_region_name}"
+        else:
+            app_qualified_name = f"{self.config.app_name}-{self.config.pipeline_region_name}"
+
+        pipeline_stage_name = (
+            pipeline_stage_name_override
+            or f"meta-pipeline-{self.config.pipeline_region_name}"
+        )
+        pipeline_stage_name = pipeline_stage_name.replace("/", "-")
+
+        pipeline_stack_name = pipeline_stack_name_override or f"Meta-Pipeline-{app_qualified_name}"
+        pipeline_stack_name = pipeline_stack_name.replace("/", "-")
+        pipeline_name = pipeline_name_override or f"meta-cdkpipeline-{app_qualified_name}"
+        pipeline_name = pipeline_name.replace("/", "-")
+
+        repository_name = repository_name_override or f"{self.config.app_name}"
+        repository_branch = "deploy/dev"
+
+        meta_config = PipelineConfig(
+            common=dataclasses.replace(
+                self.config,
+                cdk_qualifier=self.config.pipeline_cdk_qualifier,
+            ),
+            pipeline_name=pipeline_name,
+            target_environment_name=CONSOLIDATED_META_PIPELINE_TARGET_ENVIRONMENT_NAME,
+            repository_name=repository_name,
+            repository_branch=repository_branch,
+            canary_stages=[],
+            deploy_waves=[list(self.stages.values())],
+            enable_pipeline_self_diff_check=enable_pipeline_self_diff_check,
+        )
+
+        meta_stage = CrossAccountDeployPipelineStage(
+            self.scope,
+            pipeline_stage_name,
+            pipeline_stack_name=pipeline_stack_name,
+            config=meta_config,
+        )
+
+        self.meta_stages[CONSOLIDATED_META_PIPELINE_TARGET_ENVIRONMENT_NAME] = meta_stage
+
+        return meta_stage
+
 
 class CrossAccountDeployPipelineStage(Stage):
     def __init__(
@@ -218,6 +370,7 @@ class CrossAccountDeployPipelineStage(Stage):
         **kwargs,
     ):
         super().__init__(scope, construct_id, env=config.common.pipeline_env, **kwargs)
+        PerformanceChecks.add_to(self)
 
         self.pipeline_stack = CrossAccountDeployPipelineStack(
             self,
@@ -254,7 +407,11 @@ class CrossAccountDeployPipelineStack(Stack):
 
         # Drop stages with no stacks:
         canary_stages = PipelineUtils.filter_deployable_stages(config.canary_stages)
-        deploy_stages = PipelineUtils.filter_deployable_stages(config.deploy_stages)
+        deploy_waves = [
+            PipelineUtils.filter_deployable_stages(wave) for wave in config.deploy_waves
+        ]
+        deploy_waves = [wave for wave in deploy_waves if len(wave) > 0]
+        deploy_stages = [stage for wave in deploy_waves for stage in wave]
 
         # Pipeline input - CDK source code repository:
         pipeline_source_repository = codecommit.Repository.from_repository_name(
@@ -345,23 +502,67 @@ class CrossAccountDeployPipelineStack(Stack):
             describe_change_set_step_role_inner
         )
 
+        # CodeBuild step role - Bake Canary:
+        canary_bake_step_role_inner = iam.Role(
+            self,
+            "CanaryBakeStepRole",
+            assumed_by=iam.ServicePrincipal("codebuild.amazonaws.com"),
+            managed_policies=[codebuild_step_default_policy, assume_cdk_lookup_role_policy],
+        )
+        canary_bake_step_role = iam.Role.without_policy_updates(canary_bake_step_role_inner)
+
+        # CodeBuild step dependency cache - npm and pip:
+        codebuild_cache = self.__create_codebuild_cache(
+            config.common.codebuild_cache_mode,
+            cdk_synth_step_role_inner,
+            describe_change_set_step_role_inner,
+        )
+        codebuild_cache_build_spec = (
+            codebuild.BuildSpec.from_object({"cache": {"paths": CODEBUILD_CACHE_PATHS}})
+            if codebuild_cache is not None
+            else None
+        )
+
+        # Pre-built synth image with a pinned CDK CLI and Python dependencies:
+        if config.common.use_prebuilt_synth_image:
+            synth_build_environment = codebuild.BuildEnvironment(
+                build_image=self.__create_synth_image(
+                    cdk_synth_step_role_inner,
+                    cdk_cli_version=config.common.cdk_cli_version_override
+                    or DEFAULT_SYNTH_IMAGE_CDK_CLI_VERSION,
+                ),
+            )
+            synth_install_commands = []
+        else:
+            synth_build_environment = None
+            synth_install_commands = [
+                f"npm install -g aws-cdk@{config.common.cdk_cli_version_override or DEFAULT_CDK_CLI_VERSION}",
+                f"pip install {config.common.pip_install_args_override or DEFAULT_PIP_INSTALL_ARGS}",
+            ]
+
         # Define CDK synth step:
         diff_targets = set(f"{stage.stage_name}/*" for stage in canary_stages + deploy_stages)
         synth_env = {"CDK_DIFF_TARGETS": " ".join(sorted(diff_targets))}
         fail_on_pipeline_self_diff_str = str(config.enable_pipeline_self_diff_check).lower()
+        # Performance rule pack findings are warnings, or errors failing this step in fail mode:
+        synth_context_args = (
+            f" -c {PERFORMANCE_CHECKS_CONTEXT_KEY}={config.common.performance_checks_mode}"
+            if config.common.performance_checks_mode is not None
+            else ""
+        )
         synth_step = pipelines.CodeBuildStep(
             "SynthStep",
             input=pipeline_source,
-            install_commands=[
-                f"npm install -g aws-cdk@{config.common.cdk_cli_version_override or DEFAULT_CDK_CLI_VERSION}",
-                f"pip install {config.common.pip_install_args_override or DEFAULT_PIP_INSTALL_ARGS}",
-            ],
+            install_commands=synth_install_commands,
             commands=[
-                "cdk synth -q",
+                f"cdk synth -q{synth_context_args}",
                 f"cdk diff -a cdk.out/ {parent_stage.stage_name}/* --fail {fail_on_pipeline_self_diff_str} || {{ echo 'ERROR: Please update this pipeline first.'; false; }}",
                 "cdk diff -a cdk.out/ ${CDK_DIFF_TARGETS}",
             ],
             env=synth_env,
+            build_environment=synth_build_environment,
+            cache=codebuild_cache,
+            partial_build_spec=codebuild_cache_build_spec,
             action_role=codepipeline_build_action_role,
             # NOTE: Ignoring known IRole implementation issue
             role=cdk_synth_step_role,  # type: ignore
@@ -383,36 +584,78 @@ class CrossAccountDeployPipelineStack(Stack):
         pipeline_tags.add("Pipeline", config.pipeline_name)
         pipeline_tags.add("TargetEnvironment", config.target_environment_name)
 
-        # Create Canary wave:
-        canary_wave = pipeline.add_wave(CANARY_WAVE_NAME)
-        for canary_stage in canary_stages:
-            canary_wave.add_stage(canary_stage)
-
-        # Create Deploy wave:
-        deploy_wave = pipeline.add_wave(
-            DEPLOY_WAVE_NAME,
-            pre=[
+        # Approve the CDK diff before the first wave:
+        # NOTE: With a change set approval policy, each change set is gated on its own,
+        # so the CDK diff approval is skipped.
+        change_set_approval_policy = config.common.change_set_approval_policy
+        approve_cdk_diff_steps = []
+        if change_set_approval_policy is None:
+            approve_cdk_diff_steps.append(
                 ManualApprovalStep(
                     APPROVE_CDK_DIFF_ACTION_ID,
                     comment="Check Build action logs and confirm the details.",
                     role=approve_action_role,
                 )
-            ],
+            )
+
+        stack_steps_options = dict(
+            pipeline_name=config.pipeline_name,
+            pipeline_source=pipeline_source,
+            ci_support_tools_source=ci_support_tools_source,
+            # NOTE: Ignoring known IRole implementation issue 
+            describe_change_set_action_role=codepipeline_build_action_role,  # type: ignore
+            describe_change_set_step_role=describe_change_set_step_role,  # type: ignore
+            approve_change_set_action_role=approve_action_role,  # type: ignore
+            cdk_qualifier=config.common.cdk_qualifier,
+            change_set_approval_policy=change_set_approval_policy,
+            codebuild_cache=codebuild_cache,
+            codebuild_cache_build_spec=codebuild_cache_build_spec,
+            batch_describe_change_sets=config.common.batch_describe_change_sets,
+        )
+
+        canary_bake_config = config.common.canary_bake_config
+        canary_bake_step_options = dict(
+            pipeline_source=pipeline_source,
+            canary_bake_config=canary_bake_config,
+            # NOTE: Ignoring known IRole implementation issue
+            action_role=codepipeline_build_action_role,  # type: ignore
+            role=canary_bake_step_role,  # type: ignore
+            cdk_qualifier=config.common.cdk_qualifier,
+        )
+
+        # Create Canary wave, baking each canary stage before the Deploy wave:
+        canary_wave = pipeline.add_wave(
+            CANARY_WAVE_NAME,
+            pre=approve_cdk_diff_steps if len(canary_stages) > 0 else [],
         )
+        for canary_stage in canary_stages:
+            stack_steps = self.__create_deploy_stage_stack_steps(canary_stage, **stack_steps_options)
+            post_steps = []
+            if canary_bake_config is not None:
+                post_steps.append(
+                    self.__create_canary_bake_step(canary_stage, **canary_bake_step_options)
+                )
+            canary_wave.add_stage(canary_stage, stack_steps=stack_steps, post=post_steps)
 
-        # Inject Describe Change Set and Approve Change Set steps to each deploy stage:
-        for deploy_stage in deploy_stages:
-            stack_steps = self.__create_deploy_stage_stack_steps(
-                deploy_stage,
-                pipeline_name=config.pipeline_name,
-                ci_support_tools_source=ci_support_tools_source,
-                # NOTE: Ignoring known IRole implementation issue 
-                describe_change_set_action_role=codepipeline_build_action_role,  # type: ignore
-                describe_change_set_step_role=describe_change_set_step_role,  # type: ignore
-                approve_change_set_action_role=approve_action_role,  # type: ignore
-                cdk_qualifier=config.common.cdk_qualifier,
+        # Create Deploy waves, stages within a wave are deployed concurrently:
+        for wave_index, wave_stages in enumerate(deploy_waves):
+            deploy_wave = pipeline.add_wave(
+                DEPLOY_WAVE_NAME if wave_index == 0 else f"{DEPLOY_WAVE_NAME}-{wave_index + 1}",
+                pre=approve_cdk_diff_steps if wave_index == 0 and len(canary_stages) == 0 else [],
             )
-            deploy_wave.add_stage(deploy_stage, stack_steps=stack_steps)
+            is_last_wave = wave_index == len(deploy_waves) - 1
+
+            # Inject Describe Change Set and Approve Change Set steps to each deploy stage:
+            for deploy_stage in wave_stages:
+                stack_steps = self.__create_deploy_stage_stack_steps(deploy_stage, **stack_steps_options)
+
+                # Bake each stage before the next wave starts:
+                post_steps = []
+                if canary_bake_config is not None and not is_last_wave:
+                    post_steps.append(
+                        self.__create_canary_bake_step(deploy_stage, **canary_bake_step_options)
+                    )
+                deploy_wave.add_stage(deploy_stage, stack_steps=stack_steps, post=post_steps)
 
         # Build the pipeline internals to allow access to `pipeline.pipeline`:
         pipeline.build_pipeline()
@@ -422,8 +665,13 @@ class CrossAccountDeployPipelineStack(Stack):
             pipeline.pipeline,
             cdk_synth_step_role_inner,
             describe_change_set_step_role_inner,
+            canary_bake_step_role_inner,
         )
 
+        # Approve change sets that passed the change set approval policy:
+        if change_set_approval_policy is not None:
+            self.__create_change_set_auto_approval(pipeline_name=config.pipeline_name)
+
         # Add additional permissions to perform CDK diff on the pipeline stage's stacks themselves:
         cdk_synth_step_role_inner.add_to_policy(
             iam.PolicyStatement(
@@ -553,16 +801,164 @@ class CrossAccountDeployPipelineStack(Stack):
             pipeline.artifact_bucket.encryption_key.grant_encrypt_decrypt(role)
             pipeline.artifact_bucket.encryption_key.grant(role, "kms:DescribeKey")
 
+    def __create_synth_image(
+        self,
+        role: iam.Role,
+        *,
+        cdk_cli_version: str,
+    ) -> codebuild.IBuildImage:
+        # NOTE: The context only holds the Dockerfile and requirements files, and the extra hash adds
+        # the CLI version, so the image is rebuilt only when one of them changes.
+        synth_image = codebuild.LinuxBuildImage.from_asset(
+            self,
+            "SynthImage",
+            directory=".",
+            file=SYNTH_IMAGE_DOCKERFILE,
+            build_args={"CDK_CLI_VERSION": cdk_cli_version},
+            exclude=SYNTH_IMAGE_CONTEXT_EXCLUDES,
+            ignore_mode=IgnoreMode.GLOB,
+            extra_hash=compute_files_hash(
+                [SYNTH_IMAGE_DOCKERFILE, *SYNTH_IMAGE_REQUIREMENTS_FILES],
+                cdk_cli_version,
+            ),
+        )
+        # NOTE: The step role does not accept policy updates, so grant on the inner role:
+        assert synth_image.repository is not None
+        synth_image.repository.grant_pull(role)
+        return synth_image
+
+    def __create_codebuild_cache(
+        self,
+        cache_mode: Optional[str],
+        *roles: iam.Role,
+    ) -> Optional[codebuild.Cache]:
+        if cache_mode is None:
+            return None
+
+        if cache_mode == CODEBUILD_CACHE_MODE_LOCAL:
+            return codebuild.Cache.local(codebuild.LocalCacheMode.CUSTOM)
+
+        cache_bucket = s3.Bucket(
+            self,
+            "CodeBuildCacheBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            removal_policy=RemovalPolicy.DESTROY,
+            lifecycle_rules=[
+                s3.LifecycleRule(expiration=Duration.days(CODEBUILD_CACHE_EXPIRATION_DAYS))
+            ],
+        )
+        # NOTE: The step roles do not accept policy updates, so grant on the inner roles:
+        for role in roles:
+            cache_bucket.grant_read_write(role)
+
+        return codebuild.Cache.bucket(cache_bucket, prefix=self.stack_name)
+
+    def __create_canary_bake_step(
+        self,
+        canary_stage: Stage,
+        *,
+        pipeline_source: pipelines.IFileSetProducer,
+        canary_bake_config: Mapping[str, Any],
+        action_role: iam.IRole,  # For CodePipeline -> CodeBuild execution
+        role: iam.IRole,  # For CodeBuild project's own execution
+        cdk_qualifier: str,
+    ) -> pipelines.CodeBuildStep:
+        bake_config = {"bakeTimeMinutes": DEFAULT_CANARY_BAKE_TIME_MINUTES, **canary_bake_config}
+
+        # NOTE: Stages may expose CfnOutputs of their metric dimensions, keyed by env var name:
+        metric_outputs = getattr(canary_stage, CANARY_METRIC_OUTPUTS_ATTRIBUTE, {})
+
+        return pipelines.CodeBuildStep(
+            CANARY_BAKE_ACTION_ID,
+            input=pipeline_source,
+            install_commands=["pip install boto3"],
+            commands=[f"python {CANARY_BAKE_SCRIPT}"],
+            env={
+                "CANARY_BAKE_CONFIG": json.dumps(bake_config),
+                "CANARY_ACCOUNT": canary_stage.account,
+                "CANARY_REGION": canary_stage.region,
+                "CDK_QUALIFIER": cdk_qualifier,
+            },
+            env_from_cfn_outputs=metric_outputs,
+            timeout=Duration.minutes(
+                bake_config["bakeTimeMinutes"] + CANARY_BAKE_TIMEOUT_MARGIN_MINUTES
+            ),
+            action_role=action_role,
+            role=role,
+        )
+
+    def __create_change_set_auto_approval(
+        self,
+        *,
+        pipeline_name: str,
+    ) -> lambdaFunc.Function:
+        with open("./lambda/approve_change_set.py", encoding="utf8") as fp:
+            handler_code = fp.read()
+
+        pipeline_arn = f"arn:aws:codepipeline:{self.region}:{self.account}:{pipeline_name}"
+        approve_lambda = lambdaFunc.Function(
+            self,
+            "ApproveChangeSetLambda",
+            architecture=lambdaFunc.Architecture.ARM_64,
+            code=lambdaFunc.InlineCode(handler_code),
+            handler="index.lambda_handler",
+            runtime=lambdaFunc.Runtime.PYTHON_3_10,
+            environment={
+                "PIPELINE_NAME": pipeline_name,
+                "APPROVE_ACTION_ID": APPROVE_CHANGE_SET_ACTION_ID,
+                "DESCRIBE_ACTION_ID": DESCRIBE_CHANGE_SET_ACTION_ID,
+                "DECISION_VARIABLE": CHANGE_SET_DECISION_VARIABLE,
+                "SUMMARY_VARIABLE": CHANGE_SET_SUMMARY_VARIABLE,
+            },
+            initial_policy=[
+                iam.PolicyStatement(
+                    actions=[
+                        "codepipeline:GetPipelineState",
+                        "codepipeline:ListActionExecutions",
+                    ],
+                    resources=[pipeline_arn],
+                ),
+                iam.PolicyStatement(
+                    actions=["codepipeline:PutApprovalResult"],
+                    resources=[f"{pipeline_arn}/*"],
+                ),
+            ],
+        )
+
+        events.Rule(
+            self,
+            "ApproveChangeSetRule",
+            event_pattern=events.EventPattern(
+                source=["aws.codepipeline"],
+                detail_type=["CodePipeline Action Execution State Change"],
+                detail={
+                    "pipeline": [pipeline_name],
+                    "state": ["STARTED"],
+                    "type": {"category": ["Approval"]},
+                },
+            ),
+            targets=[events_targets.LambdaFunction(approve_lambda)],
+        )
+
+        return approve_lambda
+
     def __create_deploy_stage_stack_steps(
         self,
         deploy_stage: Stage,
         *,
         pipeline_name: str,
+        pipeline_source: pipelines.IFileSetProducer,
         ci_support_tools_source: pipelines.IFileSetProducer,
         describe_change_set_action_role: iam.IRole,  # For CodePipeline -> CodeBuild execution
         describe_change_set_step_role: iam.IRole,  # For CodeBuild project's own execution
         approve_change_set_action_role: iam.IRole,
         cdk_qualifier: str,
+        change_set_approval_policy: Optional[Mapping[str, Any]],
+        codebuild_cache: Optional[codebuild.Cache],
+        codebuild_cache_build_spec: Optional[codebuild.BuildSpec],
+        batch_describe_change_sets: bool,
     ) -> Sequence[pipelines.StackSteps]:
 
         stacks = [
@@ -572,23 +968,79 @@ class CrossAccountDeployPipelineStack(Stack):
         ]
         stack_steps = []
 
-        for stack in stacks:
+        # NOTE: A batched step gates a group of stacks at once, which only works when their
+        # change sets are created independently of each other, so there is a group per dependency level.
+        if batch_describe_change_sets:
+            stack_groups = PipelineUtils.group_by_dependency_level(stacks)
+        else:
+            stack_groups = [[stack] for stack in stacks]
+
+        for stack_group in stack_groups:
 
             describe_change_set_env = {
                 "PIPELINE_NAME": pipeline_name,
                 "PIPELINE_EXECUTION_ID": "#{codepipeline.PipelineExecutionId}",
                 "CDK_QUALIFIER": cdk_qualifier,
             }
+            change_set_stacks_env = {
+                "CHANGE_SET_STACKS": json.dumps(
+                    [
+                        {
+                            "stackName": stack.stack_name,
+                            "account": stack.account,
+                            "region": stack.region,
+                        }
+                        for stack in stack_group
+                    ]
+                ),
+                "CHANGE_SET_NAME": CHANGE_SET_NAME,
+            }
 
-            describe_change_set_step = pipelines.CodeBuildStep(
-                DESCRIBE_CHANGE_SET_ACTION_ID,
-                additional_inputs={"tools": ci_support_tools_source},
-                install_commands=["cd tools", "pip install -r requirements.txt"],
-                commands=["python ./describe_change_set.py"],
-                env=describe_change_set_env,
-                action_role=describe_change_set_action_role,
-                role=describe_change_set_step_role,
-            )
+            # Evaluate the change set approval policy and export its decision:
+            policy_commands = [
+                f"python $CODEBUILD_SRC_DIR/{CHANGE_SET_POLICY_SCRIPT} > change_set_decision.env",
+                "set -a && . ./change_set_decision.env && set +a",
+            ]
+            if change_set_approval_policy is not None:
+                describe_change_set_env.update(change_set_stacks_env)
+                describe_change_set_env["CHANGE_SET_POLICY"] = json.dumps(
+                    change_set_approval_policy
+                )
+
+            if batch_describe_change_sets:
+                # Describe all change sets of the group concurrently into one report:
+                describe_change_set_env.update(change_set_stacks_env)
+                describe_change_set_env["CHANGE_SET_REPORT"] = CHANGE_SET_REPORT_FILE
+                describe_change_set_step = pipelines.CodeBuildStep(
+                    DESCRIBE_CHANGE_SET_ACTION_ID,
+                    input=pipeline_source,
+                    install_commands=["pip install boto3"],
+                    commands=[*policy_commands, f"cat {CHANGE_SET_REPORT_FILE}"],
+                    env=describe_change_set_env,
+                    cache=codebuild_cache,
+                    partial_build_spec=codebuild_cache_build_spec,
+                    action_role=describe_change_set_action_role,
+                    role=describe_change_set_step_role,
+                )
+            else:
+                describe_change_set_step = pipelines.CodeBuildStep(
+                    DESCRIBE_CHANGE_SET_ACTION_ID,
+                    input=pipeline_source if change_set_approval_policy is not None else None,
+                    additional_inputs={"tools": ci_support_tools_source},
+                    install_commands=["cd tools", "pip install -r requirements.txt"],
+                    commands=[
+                        "python ./describe_change_set.py",
+                        *(policy_commands if change_set_approval_policy is not None else []),
+                    ],
+                    env=describe_change_set_env,
+                    cache=codebuild_cache,
+                    partial_build_spec=codebuild_cache_build_spec,
+                    action_role=describe_change_set_action_role,
+                    role=describe_change_set_step_role,
+                )
+            if change_set_approval_policy is not None:
+                describe_change_set_step.exported_variable(CHANGE_SET_DECISION_VARIABLE)
+                describe_change_set_step.exported_variable(CHANGE_SET_SUMMARY_VARIABLE)
 
             approve_change_set_step = ManualApprovalStep(
                 APPROVE_CHANGE_SET_ACTION_ID,
@@ -596,19 +1048,24 @@ class CrossAccountDeployPipelineStack(Stack):
                 role=approve_change_set_action_role,
             )
 
-            # Inject pipeline name tag to the stack for back-reference:
-            stack.tags.set_tag("Pipeline", pipeline_name)
-
-            stack_step = pipelines.StackSteps(
-                stack=stack,
-                change_set=pipelines.Step.sequence(
-                    [
-                        describe_change_set_step,
-                        approve_change_set_step,
-                    ]
-                ),
+            # NOTE: Stacks of a batched group share the same steps, so every stack's
+            # deployment waits for the single approval.
+            change_set_steps = pipelines.Step.sequence(
+                [
+                    describe_change_set_step,
+                    approve_change_set_step,
+                ]
             )
-            stack_steps.append(stack_step)
+
+            for stack in stack_group:
+                # Inject pipeline name tag to the stack for back-reference:
+                stack.tags.set_tag("Pipeline", pipeline_name)
+
+                stack_step = pipelines.StackSteps(
+                    stack=stack,
+                    change_set=change_set_steps,
+                )
+                stack_steps.append(stack_step)
 
         return stack_steps
 
@@ -669,6 +1126,29 @@ class PipelineUtils:
             if Stack.is_stack(construct)
         ]
 
+    @staticmethod
+    def group_by_dependency_level(stacks: Sequence[Stack]) -> List[List[Stack]]:
+        """Groups the specified stacks by the length of their longest dependency chain among them."""
+        stack_paths = set(stack.node.path for stack in stacks)
+        levels: Dict[str, int] = {}
+
+        def level_of(stack: Stack) -> int:
+            path = stack.node.path
+            if path not in levels:
+                levels[path] = 1 + max(
+                    (level_of(dependency) for dependency in stack.dependencies if dependency.node.path in stack_paths),
+                    default=-1,
+                )
+            return levels[path]
+
+        groups: List[List[Stack]] = []
+        for stack in stacks:
+            level = level_of(stack)
+            while len(groups) <= level:
+                groups.append([])
+            groups[level].append(stack)
+        return groups
+
     @staticmethod
     def get_account_ids(stages: Sequence[Stage]) -> Sequence[str]:
         """Gets all unique account IDs among all stacks within the specified list of stages."""
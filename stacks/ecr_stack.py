@@ -1,13 +1,12 @@
 from aws_cdk import (
     Environment,
     Stack,
-    CfnOutput,
     aws_ecr as ecr,
 )
 from constructs import Construct
 from typing import Dict, Mapping, Any
 from utils.constants import Constants
-from utils.functions_common import create_resource_name
+from utils.functions_common import create_resource_name, publish_value
 
 
 class ecrStack(Stack):
@@ -17,6 +16,7 @@ class ecrStack(Stack):
         construct_id: str,
         env: Environment,
         environment,
+        wiring_mode=Constants.WIRING_MODE_EXPORTS,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, env=env,**kwargs)
@@ -25,5 +25,5 @@ class ecrStack(Stack):
         self.ecr_repository = ecr.Repository(self, "ecr-demo",
                                              )
         
-        CfnOutput(self, "repository_nameOutput", value=self.ecr_repository.repository_name, export_name=f"repository-name-{environment}")
-        CfnOutput(self, "repository_uriOutput", value=self.ecr_repository.repository_uri, export_name=f"repository-uri-{environment}")
+        publish_value(self, "repository_nameOutput", self.ecr_repository.repository_name, f"repository-name-{environment}", wiring_mode)
+        publish_value(self, "repository_uriOutput", self.ecr_repository.repository_uri, f"repository-uri-{environment}", wiring_mode)
@@ -2,17 +2,21 @@ from aws_cdk import (
     Environment,
     Stack,
     CfnOutput,
-    Fn,
+    Duration,
+    RemovalPolicy,
     aws_ec2 as ec2,
     aws_ecs as ecs,
     aws_ecr as ecr,
     aws_elasticloadbalancingv2 as elb,
     aws_codedeploy as codedeploy,
+    aws_s3 as s3,
 )
 from constructs import Construct
 from typing import Dict, Mapping, Any
 from utils.constants import Constants
-from utils.functions_common import create_resource_name
+from utils.functions_common import create_resource_name, get_scaling_config, import_value, publish_value
+from utils.performance_checks import PerformanceChecks
+from stacks.session_cache import SessionCache
 
 default_http_port = Constants.DEFAULT_HTTP_PORT
 default_https_port = Constants.DEFAULT_HTTPS_PORT
@@ -81,6 +85,20 @@ class ecsClusterStack(Stack):
         )
         return sg
 
+    # Define S3 bucket for ALB access logs, ALB access logs only support SSE-S3 encryption
+    def create_alb_log_bucket(self, alb_access_logs):
+        return s3.Bucket(
+            self,
+            "ALB-Access-Logs",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+            lifecycle_rules=[
+                s3.LifecycleRule(expiration=Duration.days(alb_access_logs.get("retentionDays", 30)))
+            ],
+            removal_policy=RemovalPolicy.RETAIN,
+        )
+
     def __init__(
         self,
         scope: Construct,
@@ -93,20 +111,36 @@ class ecsClusterStack(Stack):
         app_config: Dict,
         ecr_repository,
         environment,
+        env_config: Dict = {},
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, env=env, **kwargs)
 
+        wiring_mode = app_config.get("wiringMode", Constants.WIRING_MODE_EXPORTS)
+
+        session_cache_config = env_config.get("sessionCache")
+        scaling = get_scaling_config(env_config)
+        cpu_architecture = env_config.get("cpuArchitecture", Constants.DEFAULT_CPU_ARCHITECTURE)
+
+        # Isolated subnets for the session cache, added after the public subnets to keep their CIDRs
+        subnet_configuration = [
+            ec2.SubnetConfiguration(
+                name="publicSubnet",
+                subnet_type=ec2.SubnetType.PUBLIC,
+                cidr_mask=24),
+        ]
+        if session_cache_config is not None:
+            subnet_configuration.append(
+                ec2.SubnetConfiguration(
+                    name="cacheSubnet",
+                    subnet_type=ec2.SubnetType.PRIVATE_ISOLATED,
+                    cidr_mask=26))
+
         # Create VPC with public subnets and a s3 Enpoint gateway
         vpc = ec2.Vpc(self, "VPC",
                             max_azs=2,
                             cidr=cidr,
-                            subnet_configuration=[
-                                ec2.SubnetConfiguration(
-                                    name="publicSubnet",
-                                    subnet_type=ec2.SubnetType.PUBLIC,
-                                    cidr_mask=24),
-                            ],
+                            subnet_configuration=subnet_configuration,
                       gateway_endpoints={
                                 "s3": ec2.GatewayVpcEndpointOptions(
                                     service=ec2.GatewayVpcEndpointAwsService.S3
@@ -131,6 +165,13 @@ class ecsClusterStack(Stack):
                                                load_balancer_name=alb_name,
                                                )
 
+        # Access logs of the ALB, analyzed with scripts/alb_log_analyzer.py
+        alb_access_logs = env_config.get("albAccessLogs", {})
+        if alb_access_logs.get("enabled", False):
+            self.alb_log_bucket = self.create_alb_log_bucket(alb_access_logs)
+            self.alb.log_access_logs(self.alb_log_bucket, prefix=alb_access_logs.get("prefix", alb_name))
+            CfnOutput(self, "albLogBucketOutput", value=self.alb_log_bucket.bucket_name)
+
         # Creates a new blue Target Group that routes traffic from the public Application Load Balancer (ALB) to the
         http_target_group_blue = elb.ApplicationTargetGroup(
             self, "BlueTargetGroup",
@@ -150,17 +191,21 @@ class ecsClusterStack(Stack):
         )
 
         http_target_group_blue.configure_health_check(
-            healthy_http_codes="200,301,302",
-            healthy_threshold_count=3,
-            unhealthy_threshold_count=5,
-            path=f"/{app_config['appName']}/index.jsp"
+            healthy_http_codes=Constants.HEALTH_CHECK_HEALTHY_HTTP_CODES,
+            healthy_threshold_count=Constants.HEALTH_CHECK_HEALTHY_THRESHOLD,
+            unhealthy_threshold_count=Constants.HEALTH_CHECK_UNHEALTHY_THRESHOLD,
+            interval=Duration.seconds(Constants.HEALTH_CHECK_INTERVAL_SECONDS),
+            timeout=Duration.seconds(Constants.HEALTH_CHECK_TIMEOUT_SECONDS),
+            path=Constants.HEALTH_CHECK_PATH.format(app_name=app_config['appName'])
         )
 
         http_target_group_green.configure_health_check(
-            healthy_http_codes="200,301,302",
-            healthy_threshold_count=3,
-            unhealthy_threshold_count=5,
-            path=f"/{app_config['appName']}/index.jsp"
+            healthy_http_codes=Constants.HEALTH_CHECK_HEALTHY_HTTP_CODES,
+            healthy_threshold_count=Constants.HEALTH_CHECK_HEALTHY_THRESHOLD,
+            unhealthy_threshold_count=Constants.HEALTH_CHECK_UNHEALTHY_THRESHOLD,
+            interval=Duration.seconds(Constants.HEALTH_CHECK_INTERVAL_SECONDS),
+            timeout=Duration.seconds(Constants.HEALTH_CHECK_TIMEOUT_SECONDS),
+            path=Constants.HEALTH_CHECK_PATH.format(app_name=app_config['appName'])
         )
 
         # ALB listeners
@@ -172,25 +217,37 @@ class ecsClusterStack(Stack):
                                                 
                                               )
 
-        # Create Task Definition
+        # Create Task Definition, sized by scaling (scripts/capacity_planner.py)
         task_definition = ecs.FargateTaskDefinition(
-            self, "TaskDef",)
-        repository_name=Fn.import_value("repository-name-repository-account")
+            self, "TaskDef",
+            cpu=scaling["cpu"],
+            memory_limit_mib=scaling["memory"],
+            runtime_platform=ecs.RuntimePlatform(
+                cpu_architecture=getattr(ecs.CpuArchitecture, cpu_architecture),
+                operating_system_family=ecs.OperatingSystemFamily.LINUX,
+            ),
+        )
+        repository_name=import_value(self, "repository-name-repository-account", wiring_mode)
         container = task_definition.add_container(
-            "web",
-            container_name="web",
+            Constants.CONTAINER_NAME,
+            container_name=Constants.CONTAINER_NAME,
             image=ecs.ContainerImage.from_ecr_repository(ecr.Repository.from_repository_name(self,"repo",repository_name)),
-            memory_limit_mib=256
+            memory_limit_mib=scaling["memory"]
         )
 
         port_mapping = ecs.PortMapping(
-            container_port=8080,
-            host_port=8080,
+            container_port=Constants.CONTAINER_PORT,
+            host_port=Constants.CONTAINER_PORT,
             protocol=ecs.Protocol.TCP
         )
 
         container.add_port_mappings(port_mapping)
 
+        PerformanceChecks.add_suppression(
+            task_definition, "Performance-ECS3",
+            "CodeDeploy registers the task definitions deployed by the pipeline with the content tag of the image.",
+        )
+
         # Create a cluster
         cluster = ecs.Cluster(
             self, 'EcsCluster',
@@ -202,7 +259,7 @@ class ecsClusterStack(Stack):
         service = ecs.FargateService(
             self, "Service",
             service_name=f"ECS-Service-{environment}",
-            desired_count=1,
+            desired_count=scaling["desiredCount"],
             cluster=cluster,
             task_definition=task_definition,
             deployment_controller=ecs.DeploymentController(
@@ -212,20 +269,62 @@ class ecsClusterStack(Stack):
             enable_execute_command=True
         )
 
+        # Shared session and application cache, its endpoint is injected into the container
+        if session_cache_config is not None:
+            session_cache = SessionCache(
+                self, "SessionCache",
+                vpc=vpc,
+                subnet_type=ec2.SubnetType.PRIVATE_ISOLATED,
+                clients=service,
+                cache_config=session_cache_config,
+                name=create_resource_name("SessionCache",
+                                          resource_name_prefixs["environment"],
+                                          resource_name_prefixs["region"]),
+            )
+            session_cache_environment = SessionCache.container_environment(
+                session_cache.endpoint_address,
+                session_cache.reader_endpoint_address,
+                session_cache.port,
+            )
+            for name, value in session_cache_environment.items():
+                container.add_environment(name, value)
+            # Rendered into taskdef-<env>.json by the BuildImage project of the workflow pipeline
+            publish_value(self, "sessionCacheHostOutput", session_cache.endpoint_address, f"session-cache-host-{environment}", wiring_mode)
+            publish_value(self, "sessionCacheReaderHostOutput", session_cache.reader_endpoint_address, f"session-cache-reader-host-{environment}", wiring_mode)
+
         # Adds the ECS service to the ALB target group
         service.attach_to_application_target_group(http_target_group_blue)
 
+        # Target tracking on CPU between minCapacity and maxCapacity tasks
+        # NOTE: Not on ALB requests per target, blue/green deployments swap the target group serving traffic.
+        if scaling["maxCapacity"] > scaling["minCapacity"]:
+            scalable_target = service.auto_scale_task_count(
+                min_capacity=scaling["minCapacity"],
+                max_capacity=scaling["maxCapacity"],
+            )
+            scalable_target.scale_on_cpu_utilization(
+                "CpuScaling",
+                target_utilization_percent=scaling["targetCpuPercent"],
+            )
+
         execution_role_arn = task_definition.execution_role.role_arn if task_definition.execution_role else ""
 
-        CfnOutput(self, "task_definition_execution_roleOutput", value=execution_role_arn, export_name=f"task-definition-execution-role-{environment}")
+        publish_value(self, "task_definition_execution_roleOutput", execution_role_arn, f"task-definition-execution-role-{environment}", wiring_mode)
 
         CfnOutput(self, "Output",
                   value=f"""http://{self.alb.load_balancer_dns_name}""")
-        CfnOutput(self, "clusterOutput", value=cluster.cluster_arn, export_name=f"ECS-cluster-{environment}")
-        CfnOutput(self, "serviceOutput", value=service.service_arn, export_name=f"ECS-Service-{environment}")
-        CfnOutput(self, "task_definition_arnOutput", value=task_definition.task_definition_arn, export_name=f"task-definition-arn-{environment}")
-        CfnOutput(self, "task_definition_task_roleOutput", value=task_definition.task_role.role_arn, export_name=f"task-definition-task-role-{environment}")
-        CfnOutput(self, "listenerOutput", value=http_listener.listener_arn, export_name=f"listener-{environment}")
-        CfnOutput(self, "tgblueOutput", value=http_target_group_blue.target_group_arn, export_name=f"tgblue-{environment}")
-        CfnOutput(self, "tggreenOutput", value=http_target_group_green.target_group_arn, export_name=f"tggreen-{environment}")
-        CfnOutput(self, "albsbOutput", value=ecs_alb_sg.security_group_id, export_name=f"albsg-{environment}")
+        publish_value(self, "clusterOutput", cluster.cluster_arn, f"ECS-cluster-{environment}", wiring_mode)
+        publish_value(self, "serviceOutput", service.service_arn, f"ECS-Service-{environment}", wiring_mode)
+        publish_value(self, "task_definition_arnOutput", task_definition.task_definition_arn, f"task-definition-arn-{environment}", wiring_mode)
+        publish_value(self, "task_definition_task_roleOutput", task_definition.task_role.role_arn, f"task-definition-task-role-{environment}", wiring_mode)
+        publish_value(self, "listenerOutput", http_listener.listener_arn, f"listener-{environment}", wiring_mode)
+        publish_value(self, "tgblueOutput", http_target_group_blue.target_group_arn, f"tgblue-{environment}", wiring_mode)
+        publish_value(self, "tggreenOutput", http_target_group_green.target_group_arn, f"tggreen-{environment}", wiring_mode)
+        publish_value(self, "albsbOutput", ecs_alb_sg.security_group_id, f"albsg-{environment}", wiring_mode)
+
+        # Metric dimensions captured by the deployment pipeline to bake canary stages
+        self.canary_metric_outputs = {
+            "ALB_FULL_NAME": CfnOutput(self, "albFullNameOutput", value=self.alb.load_balancer_full_name),
+            "ECS_CLUSTER_NAME": CfnOutput(self, "clusterNameOutput", value=cluster.cluster_name),
+            "ECS_SERVICE_NAME": CfnOutput(self, "serviceNameOutput", value=service.service_name),
+        }
@@ -0,0 +1,112 @@
+from aws_cdk import (
+    Environment,
+    Stack,
+    Duration,
+    aws_cloudwatch as cloudwatch,
+    aws_elasticloadbalancingv2 as elb,
+    aws_events as events,
+    aws_events_targets as events_targets,
+    aws_lambda as lambdaFunc,
+)
+import json
+from constructs import Construct
+from typing import Dict
+from utils.constants import Constants
+from utils.functions_common import create_resource_name
+
+
+class probeStack(Stack):
+
+    # Alarm on the availability and p99 latency reported by the probe for a path
+    def create_path_alarms(self, index, path, environment, probe_config, resource_name_prefixs):
+        dimensions = {"Environment": environment, "Path": path}
+        period = Duration.minutes(probe_config.get("intervalMinutes", 1))
+        evaluation_periods = probe_config.get("evaluationPeriods", 5)
+        datapoints_to_alarm = probe_config.get("datapointsToAlarm", 3)
+
+        availability = cloudwatch.Metric(
+            namespace=Constants.SYNTHETIC_PROBE_NAMESPACE,
+            metric_name="Availability",
+            dimensions_map=dimensions,
+            statistic=cloudwatch.Stats.AVERAGE,
+            period=period,
+        )
+        # NOTE: Missing probe results are breaching, the endpoint or the probe itself is down.
+        availability.create_alarm(
+            self, f"AvailabilityAlarm{index}",
+            alarm_name=create_resource_name(f"{Constants.SYNTHETIC_PROBE_ALARM_PREFIX}-availability-{index}",
+                                            resource_name_prefixs["environment"],
+                                            resource_name_prefixs["region"]),
+            alarm_description=f"Synthetic probe availability of {path}",
+            threshold=probe_config.get("availabilityThreshold", 0.99),
+            comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_THRESHOLD,
+            evaluation_periods=evaluation_periods,
+            datapoints_to_alarm=datapoints_to_alarm,
+            treat_missing_data=cloudwatch.TreatMissingData.BREACHING,
+        )
+
+        latency = cloudwatch.Metric(
+            namespace=Constants.SYNTHETIC_PROBE_NAMESPACE,
+            metric_name="Latency",
+            dimensions_map=dimensions,
+            statistic=cloudwatch.Stats.percentile(99),
+            period=period,
+        )
+        latency.create_alarm(
+            self, f"LatencyAlarm{index}",
+            alarm_name=create_resource_name(f"{Constants.SYNTHETIC_PROBE_ALARM_PREFIX}-latency-{index}",
+                                            resource_name_prefixs["environment"],
+                                            resource_name_prefixs["region"]),
+            alarm_description=f"Synthetic probe p99 latency of {path}",
+            threshold=probe_config.get("latencyThresholdMs", 1000),
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            evaluation_periods=evaluation_periods,
+            datapoints_to_alarm=datapoints_to_alarm,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        resource_name_prefixs,
+        *,
+        env: Environment,
+        environment: str,
+        alb: elb.IApplicationLoadBalancer,
+        probe_config: Dict,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, env=env, **kwargs)
+
+        paths = probe_config.get("paths", ["/"])
+        timeout_seconds = probe_config.get("timeoutSeconds", 5)
+
+        with open("./lambda/synthetic_probe.py", encoding="utf8") as fp:
+            handler_code = fp.read()
+
+        # NOTE: Results are logged in CloudWatch embedded metric format, no PutMetricData permission is needed.
+        probe_lambda = lambdaFunc.Function(
+            self, "SyntheticProbe",
+            architecture=lambdaFunc.Architecture.ARM_64,
+            code=lambdaFunc.InlineCode(handler_code),
+            handler="index.lambda_handler",
+            runtime=lambdaFunc.Runtime.PYTHON_3_10,
+            timeout=Duration.seconds(min(len(paths) * timeout_seconds + 10, 900)),
+            environment={
+                "BASE_URL": f"""http://{alb.load_balancer_dns_name}""",
+                "PROBE_PATHS": json.dumps(paths),
+                "ENVIRONMENT": environment,
+                "METRIC_NAMESPACE": Constants.SYNTHETIC_PROBE_NAMESPACE,
+                "TIMEOUT_SECONDS": str(timeout_seconds),
+            },
+        )
+
+        events.Rule(
+            self, "SyntheticProbeSchedule",
+            schedule=events.Schedule.rate(Duration.minutes(probe_config.get("intervalMinutes", 1))),
+            targets=[events_targets.LambdaFunction(probe_lambda, retry_attempts=0)],
+        )
+
+        for index, path in enumerate(paths):
+            self.create_path_alarms(index, path, environment, probe_config, resource_name_prefixs)
@@ -0,0 +1,75 @@
+from aws_cdk import (
+    Environment,
+    Stack,
+    CfnOutput,
+    aws_elasticloadbalancingv2 as elb,
+    aws_route53 as route53,
+)
+from constructs import Construct
+from typing import Dict
+from utils.constants import Constants
+from utils.functions_common import create_resource_name
+
+
+class latencyRoutingStack(Stack):
+
+    # Define Route 53 health check of the ALB, through the same path as the target groups
+    def create_health_check(self, alb, app_name, routing_config, resource_name_prefixs):
+        return route53.CfnHealthCheck(
+            self, "HealthCheck",
+            health_check_config=route53.CfnHealthCheck.HealthCheckConfigProperty(
+                type="HTTP",
+                fully_qualified_domain_name=alb.load_balancer_dns_name,
+                port=Constants.DEFAULT_HTTP_PORT,
+                resource_path=Constants.HEALTH_CHECK_PATH.format(app_name=app_name),
+                request_interval=routing_config.get("healthCheckIntervalSeconds", 30),
+                failure_threshold=routing_config.get("healthCheckFailureThreshold", 3),
+                measure_latency=True,
+            ),
+            health_check_tags=[
+                route53.CfnHealthCheck.HealthCheckTagProperty(
+                    key="Name",
+                    value=create_resource_name("HealthCheck",
+                                               resource_name_prefixs["environment"],
+                                               resource_name_prefixs["region"]),
+                ),
+            ],
+        )
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        resource_name_prefixs,
+        *,
+        env: Environment,
+        alb: elb.IApplicationLoadBalancer,
+        app_name: str,
+        routing_config: Dict,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, env=env, **kwargs)
+
+        region = resource_name_prefixs["region"]
+        health_check = self.create_health_check(alb, app_name, routing_config, resource_name_prefixs)
+
+        # Latency record of this region, every region of the environment adds one with the same name.
+        # Route 53 answers with the lowest latency region whose health check and ALB targets are healthy.
+        route53.CfnRecordSet(
+            self, "LatencyRecord",
+            hosted_zone_id=routing_config["hostedZoneId"],
+            name=routing_config["recordName"],
+            type="A",
+            set_identifier=region,
+            region=region,
+            health_check_id=health_check.attr_health_check_id,
+            alias_target=route53.CfnRecordSet.AliasTargetProperty(
+                dns_name=alb.load_balancer_dns_name,
+                hosted_zone_id=alb.load_balancer_canonical_hosted_zone_id,
+                evaluate_target_health=True,
+            ),
+        )
+
+        CfnOutput(self, "Output",
+                  value=f"""http://{routing_config["recordName"]}""")
+        CfnOutput(self, "healthCheckOutput", value=health_check.attr_health_check_id)
@@ -0,0 +1,81 @@
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_elasticache as elasticache,
+)
+from constructs import Construct
+from typing import Dict
+
+DEFAULT_CACHE_PORT = 6379
+
+
+class SessionCache(Construct):
+    """
+    Redis/Valkey replication group shared by the tasks of an ECS service, for
+    externalized sessions and a shared application cache.
+    """
+
+    @staticmethod
+    def container_environment(host, reader_host, port) -> Dict[str, str]:
+        """
+        Return the environment variables of the app container reaching the cache.
+        """
+        return {
+            "SESSION_CACHE_HOST": host,
+            "SESSION_CACHE_READER_HOST": reader_host,
+            "SESSION_CACHE_PORT": str(port),
+            "SESSION_CACHE_TLS": "true",
+        }
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        *,
+        vpc: ec2.IVpc,
+        subnet_type: ec2.SubnetType,
+        clients: ec2.IConnectable,
+        cache_config: Dict,
+        name: str,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.port = cache_config.get("port", DEFAULT_CACHE_PORT)
+        replicas = cache_config.get("replicas", 0)
+
+        subnet_group = elasticache.CfnSubnetGroup(
+            self, "SubnetGroup",
+            description=f"{name} subnets",
+            subnet_ids=vpc.select_subnets(subnet_type=subnet_type).subnet_ids,
+        )
+
+        # Only the clients (the task security group) reach the cache
+        self.security_group = ec2.SecurityGroup(
+            self, "SecurityGroup",
+            vpc=vpc,
+            allow_all_outbound=False,
+            description=f"{name} Security Group",
+        )
+        self.security_group.connections.allow_from(
+            clients,
+            ec2.Port.tcp(self.port),
+            "Tasks access the session cache",
+        )
+
+        self.replication_group = elasticache.CfnReplicationGroup(
+            self, "ReplicationGroup",
+            replication_group_description=f"{name} sessions and application cache",
+            engine=cache_config.get("engine", "valkey"),
+            engine_version=cache_config.get("engineVersion", "7.2"),
+            cache_node_type=cache_config.get("nodeType", "cache.t4g.micro"),
+            num_cache_clusters=1 + replicas,
+            automatic_failover_enabled=replicas > 0,
+            multi_az_enabled=replicas > 0,
+            port=self.port,
+            cache_subnet_group_name=subnet_group.ref,
+            security_group_ids=[self.security_group.security_group_id],
+            at_rest_encryption_enabled=True,
+            transit_encryption_enabled=True,
+        )
+
+        self.endpoint_address = self.replication_group.attr_primary_end_point_address
+        self.reader_endpoint_address = self.replication_group.attr_reader_end_point_address
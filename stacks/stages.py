@@ -4,6 +4,10 @@ from typing import Any, Mapping, Dict
 
 from stacks.ecs_stack import ecsClusterStack
 from stacks.ecr_stack import ecrStack
+from stacks.cdn_stack import cloudFrontStack
+from stacks.probe_stack import probeStack
+from stacks.routing_stack import latencyRoutingStack
+from utils.performance_checks import PerformanceChecks
 # from stacks.workflow_pipeline_stack import workflowPipelineStack
 
 
@@ -19,9 +23,12 @@ class DeployStage(Stage):
         cidr: str,
         region: str,
         ecr_repository,
+        env_config: Dict = {},
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, env=env, **kwargs)
+        # Performance rule pack: cdk synth -c performance-checks=warn|fail|off, warn by default
+        PerformanceChecks.add_to(self)
 
         stack_name_prefix = f"{environment}-{region}"
         resource_name_prefixs = {
@@ -39,5 +46,51 @@ class DeployStage(Stage):
             ports_app=app_config,
             app_config=app_config,
             ecr_repository=ecr_repository,
-            environment=environment
+            environment=environment,
+            env_config=env_config
         )
+
+        # CloudFront distribution in front of the ALB
+        if app_config.get("cdn", {}).get("enabled", False):
+            cdn_stack = cloudFrontStack(
+                self,
+                "CDN",
+                resource_name_prefixs=resource_name_prefixs,
+                stack_name=f"{stack_name_prefix}-CDN",
+                env=env,
+                alb=ecs_stack.alb,
+                cdn_config=app_config["cdn"],
+            )
+            # NOTE: Cross-stack references only become stack dependencies in synth, after the
+            # pipeline is built, so declare it for the pipeline to deploy the stacks in order.
+            cdn_stack.add_dependency(ecs_stack)
+
+        # Scheduled synthetic probes of the ALB with latency and availability alarms
+        if app_config.get("syntheticProbes", {}).get("enabled", False):
+            probe_stack = probeStack(
+                self,
+                "Probe",
+                resource_name_prefixs=resource_name_prefixs,
+                stack_name=f"{stack_name_prefix}-Probe",
+                env=env,
+                environment=environment,
+                alb=ecs_stack.alb,
+                probe_config=app_config["syntheticProbes"],
+            )
+            probe_stack.add_dependency(ecs_stack)
+
+        # Latency-based Route 53 record of this region for the environment's global name
+        if "globalRouting" in env_config:
+            routing_stack = latencyRoutingStack(
+                self,
+                "Routing",
+                resource_name_prefixs=resource_name_prefixs,
+                stack_name=f"{stack_name_prefix}-Routing",
+                env=env,
+                alb=ecs_stack.alb,
+                app_name=app_config["appName"],
+                routing_config=env_config["globalRouting"],
+            )
+            routing_stack.add_dependency(ecs_stack)
+
+        self.canary_metric_outputs = ecs_stack.canary_metric_outputs
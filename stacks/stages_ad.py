@@ -3,6 +3,7 @@ from constructs import Construct
 from typing import Any, Mapping, Dict
 
 from stacks.ecr_stack import ecrStack
+from utils.performance_checks import PerformanceChecks
 # from stacks.workflow_pipeline_stack import workflowPipelineStack
 
 
@@ -15,9 +16,12 @@ class DeployStageAD(Stage):
         environment: str,
         env: Environment,
         region: str,
+        wiring_mode: str,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, env=env, **kwargs)
+        # Performance rule pack: cdk synth -c performance-checks=warn|fail|off, warn by default
+        PerformanceChecks.add_to(self)
 
         stack_name_prefix = f"{environment}-{region}"
         resource_name_prefixs = {
@@ -31,6 +35,7 @@ class DeployStageAD(Stage):
             "ECR",
             stack_name=f"{stack_name_prefix}-ECR",
             env=env,
-            environment=environment
+            environment=environment,
+            wiring_mode=wiring_mode
         )
 
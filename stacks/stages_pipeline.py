@@ -3,6 +3,7 @@ from constructs import Construct
 from typing import Any, Mapping, Dict
 
 from stacks.workflow_pipeline_stack import workflowPipelineStack
+from utils.performance_checks import PerformanceChecks
 
 
 class DeployStagePipeline(Stage):
@@ -15,10 +16,13 @@ class DeployStagePipeline(Stage):
         env: Environment,
         region: str,
         app_config: Dict,
+        deploy_environments: Dict,
         webhook_url_slack,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, env=env, **kwargs)
+        # Performance rule pack: cdk synth -c performance-checks=warn|fail|off, warn by default
+        PerformanceChecks.add_to(self)
 
         stack_name_prefix = f"{environment}-{region}"
         resource_name_prefixs = {
@@ -31,6 +35,7 @@ class DeployStagePipeline(Stage):
             "WORKFLOW-PIPELINE",
             stack_name="WORKFLOW-PIPELINE",
             app_config=app_config,
+            deploy_environments=deploy_environments,
             env=env,
             webhook_url_slack=webhook_url_slack
         ) 
@@ -2,7 +2,6 @@ from aws_cdk import (
     Environment,
     Stack,
     CfnOutput,
-    Fn,
     Arn,
     ArnComponents,
     aws_ecs as ecs,
@@ -18,17 +17,56 @@ from aws_cdk import (
     aws_ecr as ecr,
     aws_ec2 as ec2,
     aws_sns as sns,
+    aws_events as events,
+    aws_events_targets as events_targets,
+    aws_s3 as s3,
+    aws_s3_assets as s3_assets,
     
 )
+import json
+import shlex
 import yaml
 from constructs import Construct
-from typing import Dict, Mapping, Any
+from typing import Dict, List, Mapping, Any, Tuple
 from utils.constants import Constants
-from utils.functions_common import create_resource_name
+from utils.functions_common import compute_files_hash, create_resource_name, get_scaling_config, import_value
+from stacks.session_cache import DEFAULT_CACHE_PORT, SessionCache
 
 default_http_port = Constants.DEFAULT_HTTP_PORT
 default_https_port = Constants.DEFAULT_HTTPS_PORT
 
+# CodeBuild images per architecture, Lambda compute types need the Lambda images
+BUILD_IMAGES = {
+    "x86": (codebuild.LinuxBuildImage, codebuild.LinuxBuildImage.STANDARD_7_0),
+    "arm": (codebuild.LinuxArmBuildImage, codebuild.LinuxArmBuildImage.AMAZON_LINUX_2_STANDARD_3_0),
+}
+LAMBDA_BUILD_IMAGES = {
+    "x86": (codebuild.LinuxLambdaBuildImage, codebuild.LinuxLambdaBuildImage.AMAZON_LINUX_2_CORRETTO_17),
+    "arm": (codebuild.LinuxArmLambdaBuildImage, codebuild.LinuxArmLambdaBuildImage.AMAZON_LINUX_2_CORRETTO_17),
+}
+# Non-Lambda compute types available with ARM images
+ARM_COMPUTE_TYPES = ("SMALL", "LARGE")
+
+UNITTEST_SHARD_SCRIPT = "scripts/shard_tests.py"
+UNITTEST_REPORT_GROUP_NAME = "unittest-reports"
+UNITTEST_REPORT_FILES = ["target/surefire-reports/TEST-*.xml"]
+UNITTEST_TIMINGS_KEY = "unittest/timings.json"
+
+BUILD_IMAGE_VARIABLES_NAMESPACE = "BuildImage"
+INTERGRATION_LOCAL_NETWORK = "intergration"
+DEFAULT_INTERGRATION_CONTAINER_PORT = 8080
+DEFAULT_INTERGRATION_HEALTH_CHECK_RETRIES = 30
+
+WORKFLOW_PIPELINE_NAME = "workflow-Pipeline"
+SOURCE_ACTION_NAME = "CodeCommit"
+
+# Inputs of the image build besides the application source
+BUILD_IMAGE_INPUT_FILES = [
+    "data/app-sources/buildspec_build_image.yaml",
+    "data/app-sources/Dockerfile",
+]
+SOCI_DEFAULT_VERSION = "0.7.0"
+
 
 class workflowPipelineStack(Stack):
 
@@ -39,16 +77,58 @@ class workflowPipelineStack(Stack):
         *,
         env: Environment,
         app_config,
+        deploy_environments: Dict,
         webhook_url_slack,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, env=env, **kwargs)
 
+        wiring_mode = app_config.get("wiringMode", Constants.WIRING_MODE_EXPORTS)
+        build_profiles = app_config.get("buildProfiles", {})
+        # Execution mode and git push trigger filters of the workflow pipeline
+        workflow_pipeline_config = app_config.get("workflowPipeline", {})
+        trigger_filters = workflow_pipeline_config.get("triggers")
+
+        def is_lambda_compute(stage):
+            return build_profiles.get(stage, {}).get("computeType", "SMALL").startswith("LAMBDA_")
+
         # Load buildspec file for codebuild
         def load_buildspec(stage):
             with open(f"data/app-sources/buildspec_{stage}.yaml", "r") as f:
                 build_spec = f.read()
-                return yaml.safe_load(build_spec)
+                build_spec = yaml.safe_load(build_spec)
+            # Lambda compute does not support runtime-versions, the image provides the runtime
+            if is_lambda_compute(stage):
+                phases = build_spec.get("phases", {})
+                phases.get("install", {}).pop("runtime-versions", None)
+                if phases.get("install") == {}:
+                    del phases["install"]
+            return build_spec
+
+        # Build environment from appConfig.buildProfiles, defaults to a small x86 builder
+        def build_environment(stage, privileged=False):
+            profile = build_profiles.get(stage, {})
+            architecture = profile.get("architecture", "x86")
+            if architecture not in BUILD_IMAGES:
+                raise ValueError(f"Unknown build architecture for {stage}: {architecture}")
+            if is_lambda_compute(stage) and privileged:
+                raise ValueError(f"Lambda compute does not support privileged builds: {stage}")
+            compute_type = profile.get("computeType", "SMALL")
+            if architecture == "arm" and not is_lambda_compute(stage) and compute_type not in ARM_COMPUTE_TYPES:
+                raise ValueError(
+                    f"appConfig.buildProfiles.{stage}: ARM images only support the {' and '.join(ARM_COMPUTE_TYPES)}"
+                    f" compute types, not {compute_type}"
+                )
+
+            image_class, build_image = (LAMBDA_BUILD_IMAGES if is_lambda_compute(stage) else BUILD_IMAGES)[architecture]
+            if "image" in profile:
+                build_image = getattr(image_class, profile["image"])
+
+            return codebuild.BuildEnvironment(
+                build_image=build_image,
+                compute_type=codebuild.ComputeType[compute_type],
+                privileged=privileged,
+            )
 
         # Creates new pipeline artifacts
         source_artifact = codepipeline.Artifact("SourceArtifact")
@@ -57,6 +137,7 @@ class workflowPipelineStack(Stack):
         build_unittest_artifact = codepipeline.Artifact("BuildUnittestArtifact")
         build_code_analysis_artifact = codepipeline.Artifact("BuildCodeAnalysisArtifact")
         build_intergration_artifact = codepipeline.Artifact("BuildIntergrationArtifact")
+        build_intergration_local_artifact = codepipeline.Artifact("BuildIntergrationLocalArtifact")
         build_loadtest_artifact = codepipeline.Artifact("BuildLoadTestArtifact")
         self.deployment_groups = []
 
@@ -65,7 +146,13 @@ class workflowPipelineStack(Stack):
         build_code_analysis_spec = load_buildspec("code_analysis")
         build_intergration_spec = load_buildspec("intergration")
         build_load_test_spec = load_buildspec("load_test")
-        build_unittest_spec = load_buildspec("unittest")
+        # Sharded unit tests run as a batch build, one build per shard
+        unittest_shards = app_config.get("unittestSharding", {}).get("shards", 1)
+        if unittest_shards > 1:
+            build_unittest_spec = load_buildspec("unittest_sharded")
+            build_unittest_timings_spec = load_buildspec("unittest_timings")
+        else:
+            build_unittest_spec = load_buildspec("unittest")
 
 
         # Get codecommit repository
@@ -77,6 +164,7 @@ class workflowPipelineStack(Stack):
         build_build = codebuild.Project(
             self, "Build-build",
             build_spec=codebuild.BuildSpec.from_object_to_yaml(build_build_spec),
+            environment=build_environment("build"),
             source=codebuild.Source.code_commit(
                 repository=code_repository,
                 branch_or_ref=app_config["branch"],
@@ -84,19 +172,45 @@ class workflowPipelineStack(Stack):
         )
 
         # CodeBuild project that builds unittest
-        build_unittest = codebuild.Project(
-            self, "Build-unittest",
-            build_spec=codebuild.BuildSpec.from_object_to_yaml(build_unittest_spec),
-            source=codebuild.Source.code_commit(
-                repository=code_repository,
-                branch_or_ref=app_config["branch"],
+        build_unittest_timings_actions = []
+        if unittest_shards > 1:
+            build_unittest, build_unittest_timings = self.__create_sharded_unittest_project(
+                build_spec=build_unittest_spec,
+                timings_build_spec=build_unittest_timings_spec,
+                environment=build_environment("unittest"),
+                timings_environment=build_environment("unittest_timings"),
+                source=codebuild.Source.code_commit(
+                    repository=code_repository,
+                    branch_or_ref=app_config["branch"],
+                ),
+                shards=unittest_shards,
+                env=env,
+            )
+            # Replaces the timings once the whole batch completed, so every shard of a run reads the same ones
+            build_unittest_timings_actions.append(
+                codepipeline_actions.CodeBuildAction(
+                    action_name="unit-test-timings",
+                    input=build_unittest_artifact,
+                    project=build_unittest_timings,
+                    run_order=2,
+                )
+            )
+        else:
+            build_unittest = codebuild.Project(
+                self, "Build-unittest",
+                build_spec=codebuild.BuildSpec.from_object_to_yaml(build_unittest_spec),
+                environment=build_environment("unittest"),
+                source=codebuild.Source.code_commit(
+                    repository=code_repository,
+                    branch_or_ref=app_config["branch"],
+                )
             )
-        )
 
         # CodeBuild project that builds code analysis
         build_code_analysis = codebuild.Project(
             self, "Build-code-analysis",
             build_spec=codebuild.BuildSpec.from_object_to_yaml(build_code_analysis_spec),
+            environment=build_environment("code_analysis"),
             source=codebuild.Source.code_commit(
                 repository=code_repository,
                 branch_or_ref=app_config["branch"],
@@ -107,6 +221,7 @@ class workflowPipelineStack(Stack):
         build_intergration = codebuild.Project(
             self, "Build-intergration",
             build_spec=codebuild.BuildSpec.from_object_to_yaml(build_intergration_spec),
+            environment=build_environment("intergration"),
             source=codebuild.Source.code_commit(
                 repository=code_repository,
                 branch_or_ref=app_config["branch"],
@@ -117,6 +232,7 @@ class workflowPipelineStack(Stack):
         build_load_test = codebuild.Project(
             self, "Build-load-test",
             build_spec=codebuild.BuildSpec.from_object_to_yaml(build_load_test_spec),
+            environment=build_environment("load_test"),
             source=codebuild.Source.code_commit(
                 repository=code_repository,
                 branch_or_ref=app_config["branch"],
@@ -124,11 +240,44 @@ class workflowPipelineStack(Stack):
         )
 
         #import values                                                        
-        task_definition_arn=Fn.import_value("task-definition-arn-dev")
-        task_definition_task_role=Fn.import_value("task-definition-task-role-dev")
-        task_definition_execution_role=Fn.import_value("task-definition-execution-role-dev")
-        repository_name=Fn.import_value("repository-name-repository-account")
-        repository_uri=Fn.import_value("repository-uri-repository-account")
+        # Task definition values rendered into taskdef-<env>.json and appspec-<env>.yaml by BuildImage
+        task_definition_variables = {}
+        image_platforms = app_config.get("imagePlatforms", Constants.DEFAULT_IMAGE_PLATFORMS)
+        for environment, environment_config in deploy_environments.items():
+            key = environment.upper().replace("-", "_")
+            scaling = get_scaling_config(environment_config)
+            cpu_architecture = environment_config.get("cpuArchitecture", Constants.DEFAULT_CPU_ARCHITECTURE)
+            if Constants.CPU_ARCHITECTURE_PLATFORMS.get(cpu_architecture) not in image_platforms:
+                raise ValueError(f"{environment}: the {cpu_architecture} tasks need an image built for it, add it to appConfig.imagePlatforms")
+            # Same container environment as the task definition of ecsClusterStack
+            container_environment = {}
+            session_cache_config = environment_config.get("sessionCache")
+            if session_cache_config is not None:
+                container_environment = SessionCache.container_environment(
+                    import_value(self, f"session-cache-host-{environment}", wiring_mode),
+                    import_value(self, f"session-cache-reader-host-{environment}", wiring_mode),
+                    session_cache_config.get("port", DEFAULT_CACHE_PORT),
+                )
+            task_definition_variables.update({
+                f"TASK_DEFINITION_ARN_{key}": codebuild.BuildEnvironmentVariable(value=import_value(self, f"task-definition-arn-{environment}", wiring_mode)),
+                f"TASK_ROLE_ARN_{key}": codebuild.BuildEnvironmentVariable(value=import_value(self, f"task-definition-task-role-{environment}", wiring_mode)),
+                f"EXECUTION_ROLE_ARN_{key}": codebuild.BuildEnvironmentVariable(value=import_value(self, f"task-definition-execution-role-{environment}", wiring_mode)),
+                f"TASK_CPU_{key}": codebuild.BuildEnvironmentVariable(value=str(scaling["cpu"])),
+                f"TASK_MEMORY_{key}": codebuild.BuildEnvironmentVariable(value=str(scaling["memory"])),
+                f"TASK_CPU_ARCHITECTURE_{key}": codebuild.BuildEnvironmentVariable(value=cpu_architecture),
+                f"TASK_ENVIRONMENT_{key}": codebuild.BuildEnvironmentVariable(value=json.dumps(
+                    [{"name": name, "value": value} for name, value in container_environment.items()]
+                )),
+            })
+        repository_name=import_value(self, "repository-name-repository-account", wiring_mode)
+        repository_uri=import_value(self, "repository-uri-repository-account", wiring_mode)
+        soci_config = app_config.get("soci", {})
+        # NOTE: Enabled SOCI settings are hashed too, images built without an index are rebuilt with one.
+        build_image_inputs_hash = compute_files_hash(
+            BUILD_IMAGE_INPUT_FILES,
+            *([json.dumps(soci_config, sort_keys=True)] if soci_config.get("enabled", False) else []),
+            *([",".join(image_platforms)] if "imagePlatforms" in app_config else []),
+        )
 
         # CodeBuild project that builds the Docker image
         build_image = codebuild.Project(
@@ -138,25 +287,64 @@ class workflowPipelineStack(Stack):
                 repository=code_repository,
                 branch_or_ref=app_config["branch"],
             ),
-            environment=codebuild.BuildEnvironment(
-                privileged=True
-            ),
+            environment=build_environment("build_image", privileged=True),
 
             environment_variables={
                 "AWS_ACCOUNT_ID": codebuild.BuildEnvironmentVariable(value=env.account),
                 "REGION": codebuild.BuildEnvironmentVariable(value=env.region),
                 "IMAGE_TAG": codebuild.BuildEnvironmentVariable(value="latest"),
+                "INPUTS_HASH": codebuild.BuildEnvironmentVariable(value=build_image_inputs_hash),
                 "IMAGE_REPO_NAME": codebuild.BuildEnvironmentVariable(value=repository_name),
                 "REPOSITORY_URI": codebuild.BuildEnvironmentVariable(value=repository_uri),
-                "TASK_DEFINITION_ARN": codebuild.BuildEnvironmentVariable(value=task_definition_arn),
-                "TASK_ROLE_ARN": codebuild.BuildEnvironmentVariable(value=task_definition_task_role),
-                "EXECUTION_ROLE_ARN": codebuild.BuildEnvironmentVariable(value= task_definition_execution_role)
+                "DEPLOY_ENVIRONMENTS": codebuild.BuildEnvironmentVariable(value=" ".join(deploy_environments)),
+                "IMAGE_PLATFORMS": codebuild.BuildEnvironmentVariable(value=",".join(image_platforms)),
+                # Seekable OCI index for lazy loading on Fargate
+                "SOCI_ENABLED": codebuild.BuildEnvironmentVariable(value=str(soci_config.get("enabled", False)).lower()),
+                "SOCI_VERSION": codebuild.BuildEnvironmentVariable(value=soci_config.get("version", SOCI_DEFAULT_VERSION)),
+                "SOCI_MIN_LAYER_SIZE": codebuild.BuildEnvironmentVariable(value=str(soci_config.get("minLayerSizeMib", 10) * 1024 * 1024)),
+                **task_definition_variables,
             }
         )
         ecr_repository=ecr.Repository.from_repository_name(self,"ecr_repo",repository_name)
         # Grants CodeBuild project access to pull/push images from/to ECR repo
         ecr_repository.grant_pull_push(build_image)
 
+        # Pre-deploy intergration tests run the freshly built image inside the build container
+        intergration_config = app_config.get("intergrationTests", {})
+        build_intergration_local = None
+        if intergration_config.get("preDeploy", False):
+            build_intergration_local = codebuild.Project(
+                self, "Build-intergration-local",
+                build_spec=codebuild.BuildSpec.from_object_to_yaml(
+                    self.__create_intergration_local_spec(
+                        intergration_config.get("dependencies", []),
+                        intergration_config.get("appEnvironment", {}),
+                    )
+                ),
+                source=codebuild.Source.code_commit(
+                    repository=code_repository,
+                    branch_or_ref=app_config["branch"],
+                ),
+                environment=build_environment("intergration_local", privileged=True),
+                environment_variables={
+                    "AWS_ACCOUNT_ID": codebuild.BuildEnvironmentVariable(value=env.account),
+                    "REGION": codebuild.BuildEnvironmentVariable(value=env.region),
+                    "REPOSITORY_URI": codebuild.BuildEnvironmentVariable(value=repository_uri),
+                    "CONTAINER_PORT": codebuild.BuildEnvironmentVariable(
+                        value=str(intergration_config.get("containerPort", DEFAULT_INTERGRATION_CONTAINER_PORT))
+                    ),
+                    "HEALTH_CHECK_PATH": codebuild.BuildEnvironmentVariable(
+                        value=intergration_config.get("healthCheckPath", "/")
+                    ),
+                    "HEALTH_CHECK_RETRIES": codebuild.BuildEnvironmentVariable(
+                        value=str(intergration_config.get("healthCheckRetries", DEFAULT_INTERGRATION_HEALTH_CHECK_RETRIES))
+                    ),
+                }
+            )
+            ecr_repository.grant_pull(build_intergration_local)
+        # Allows the build to look up images already built from the same inputs
+        ecr_repository.grant(build_image, "ecr:DescribeImages")
+
         # Lambda function that triggers CodeBuild image build project
         trigger_code_build = lambdaFunc.Function(
             self, "BuildLambda",
@@ -166,7 +354,11 @@ class workflowPipelineStack(Stack):
             runtime=lambdaFunc.Runtime.NODEJS_20_X,
             environment={
                 "CODEBUILD_PROJECT_NAME": build_image.project_name,
-                "REGION": env.region
+                "REGION": env.region,
+                "SOURCE_REPOSITORY_NAME": app_config["repository"],
+                "SOURCE_BRANCH": app_config["branch"],
+                "IMAGE_REPO_NAME": repository_name,
+                "INPUTS_HASH": build_image_inputs_hash,
             },
             # Allows this Lambda function to trigger the buildImage CodeBuild project
             initial_policy=[
@@ -174,10 +366,29 @@ class workflowPipelineStack(Stack):
                     effect=iam.Effect.ALLOW,
                     actions=["codebuild:StartBuild"],
                     resources=[build_image.project_arn]
-                )
+                ),
+                # Allows this Lambda function to skip the build when the image already exists
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["codecommit:GetBranch"],
+                    resources=[code_repository.repository_arn]
+                ),
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["ecr:DescribeImages"],
+                    resources=[ecr_repository.repository_arn]
+                ),
             ]
         )
 
+        # The trigger only runs again when the build inputs change, the Lambda function
+        # then skips the build if the image of the current commit and inputs exists.
+        trigger_parameters = {
+            "FunctionName": trigger_code_build.function_name,
+            "InvocationType": "Event",
+            "Payload": json.dumps({"inputsHash": build_image_inputs_hash}),
+        }
+
         # Triggers a Lambda function using AWS SDK
         trigger_lambda = custom.AwsCustomResource(
             self, "BuildLambdaTrigger",
@@ -193,18 +404,13 @@ class workflowPipelineStack(Stack):
                 "service": "Lambda",
                 "action": "invoke",
                 "physical_resource_id": custom.PhysicalResourceId.of("id"),
-                "parameters": {
-                    "FunctionName": trigger_code_build.function_name,
-                    "InvocationType": "Event",
-                },
+                "parameters": trigger_parameters,
             },
             on_update={
                 "service": "Lambda",
                 "action": "invoke",
-                "parameters": {
-                    "FunctionName": trigger_code_build.function_name,
-                    "InvocationType": "Event",
-                },
+                "physical_resource_id": custom.PhysicalResourceId.of("id"),
+                "parameters": trigger_parameters,
             }
         )
 
@@ -213,27 +419,51 @@ class workflowPipelineStack(Stack):
             stage_name="Source",
             actions=[
                 codepipeline_actions.CodeCommitSourceAction(
-                    action_name="CodeCommit",
+                    action_name=SOURCE_ACTION_NAME,
                     branch=app_config["branch"],
                     output=source_artifact,
-                    repository=code_repository
+                    repository=code_repository,
+                    # Pushes are filtered by the trigger Lambda function when filters are configured
+                    trigger=codepipeline_actions.CodeCommitTrigger.NONE if trigger_filters else codepipeline_actions.CodeCommitTrigger.EVENTS,
                 )
             ]
         )
 
         # Creates the build image stage for CodePipeline
+        build_image_action = codepipeline_actions.CodeBuildAction(
+            action_name="DockerBuildPush",
+            input=codepipeline.Artifact("SourceArtifact"),
+            project=build_image,
+            outputs=[build_image_artifact],
+            variables_namespace=BUILD_IMAGE_VARIABLES_NAMESPACE,
+        )
         build_image_stage = codepipeline.StageProps(
             stage_name="Build-image",
             actions=[
-                codepipeline_actions.CodeBuildAction(
-                    action_name="DockerBuildPush",
-                    input=codepipeline.Artifact("SourceArtifact"),
-                    project=build_image,
-                    outputs=[build_image_artifact]
-                )
+                build_image_action
             ]
         )
 
+        # Creates the pre-deploy intergration stage for CodePipeline, testing the image tag built above
+        pre_deploy_stages = []
+        if build_intergration_local is not None:
+            pre_deploy_stages.append(codepipeline.StageProps(
+                stage_name="Build-intergration-local",
+                actions=[
+                    codepipeline_actions.CodeBuildAction(
+                        action_name="intergration-local",
+                        input=codepipeline.Artifact("SourceArtifact"),
+                        project=build_intergration_local,
+                        outputs=[build_intergration_local_artifact],
+                        environment_variables={
+                            "IMAGE_TAG": codebuild.BuildEnvironmentVariable(
+                                value=build_image_action.variable("CONTENT_TAG")
+                            ),
+                        },
+                    )
+                ]
+            ))
+
         # Creates the build stage for CodePipeline
         build_stage = codepipeline.StageProps(
             stage_name="Build-build",
@@ -255,8 +485,11 @@ class workflowPipelineStack(Stack):
                     action_name="unit-test",
                     input=codepipeline.Artifact("SourceArtifact"),
                     project=build_unittest,
-                    outputs=[build_unittest_artifact]
-                )
+                    outputs=[build_unittest_artifact],
+                    execute_batch_build=unittest_shards > 1,
+                    combine_batch_build_artifacts=unittest_shards > 1,
+                ),
+                *build_unittest_timings_actions,
             ]
         )
 
@@ -273,158 +506,92 @@ class workflowPipelineStack(Stack):
             ]
         )
 
-        # Creates the intergration stage for CodePipeline
-        build_intergration_stage = codepipeline.StageProps(
-            stage_name="Build-intergratution",
-            actions=[
-                codepipeline_actions.CodeBuildAction(
-                    action_name="intergratution",
-                    input=codepipeline.Artifact("SourceArtifact"),
-                    project=build_intergration,
-                    outputs=[build_intergration_artifact]
-                )
-            ]
-        )
-
-        # Creates the load test stage for CodePipeline
-        build_load_test_stage = codepipeline.StageProps(
-            stage_name="Build-load-test",
-            actions=[
-                codepipeline_actions.CodeBuildAction(
-                    action_name="load-test",
-                    input=codepipeline.Artifact("SourceArtifact"),
-                    project=build_load_test,
-                    outputs=[build_loadtest_artifact]
-                )
-            ]
-        )
-        
-        #import dev values
-        cluster_dev= Fn.import_value("ECS-cluster-dev")
-        service_dev= Fn.import_value("ECS-Service-dev")
-        listener_arn_dev=Fn.import_value("listener-dev")
-        blue_target_group_arn_dev=Fn.import_value("tgblue-dev")
-        green_target_group_arn_dev=Fn.import_value("tggreen-dev")
-        alb_sg_id_dev=Fn.import_value("albsg-dev")
-
-
-        # Creates a new CodeDeploy Deployment Group for Dev
-        deployment_group_dev = codedeploy.EcsDeploymentGroup(
-            self, "CodeDeployGroup-Dev",
-            service=ecs.FargateService.from_fargate_service_attributes(self,"service-dev",service_arn=service_dev, cluster=ecs.Cluster.from_cluster_arn(self,"cluster-dev",cluster_arn=cluster_dev)),
-            # Configurations for CodeDeploy Blue/Green deployments
-            blue_green_deployment_config=codedeploy.EcsBlueGreenDeploymentConfig(
-                listener=elb.ApplicationListener.from_application_listener_attributes(self,"listener-dev",listener_arn=listener_arn_dev,security_group=ec2.SecurityGroup.from_security_group_id(self,"sg-dev",alb_sg_id_dev)),
-                blue_target_group=elb.ApplicationTargetGroup.from_target_group_attributes(self,"blue_tg-dev",target_group_arn=blue_target_group_arn_dev),
-                green_target_group=elb.ApplicationTargetGroup.from_target_group_attributes(self,"green_tg-dev",target_group_arn=green_target_group_arn_dev)
-            )
-        )
-
-        # Creates the deploy dev stage for CodePipeline
-        deploy_dev_stage = codepipeline.StageProps(
-            stage_name="Deploy-dev",
-            actions=[
-                codepipeline_actions.CodeDeployEcsDeployAction(
-                    action_name="EcsDeploy",
-                    app_spec_template_input=build_image_artifact,
-                    task_definition_template_input=build_image_artifact,
-                    deployment_group=deployment_group_dev
-                )
-            ]
-        )
-
-
-        #import staging values
-        cluster_staging= Fn.import_value("ECS-cluster-staging")
-        service_staging= Fn.import_value("ECS-Service-staging")
-        listener_arn_staging=Fn.import_value("listener-staging")
-        blue_target_group_arn_staging=Fn.import_value("tgblue-staging")
-        green_target_group_arn_staging=Fn.import_value("tggreen-staging")
-        alb_sg_id_staging=Fn.import_value("albsg-staging")
-
-
-        # Creates a new CodeDeploy Deployment Group for staging
-        deployment_group_staging = codedeploy.EcsDeploymentGroup(
-            self, "CodeDeployGroup-Staging",
-            service=ecs.FargateService.from_fargate_service_attributes(self,"service-stg",service_arn=service_staging, cluster=ecs.Cluster.from_cluster_arn(self,"cluster-stg",cluster_arn=cluster_staging)),
-            # Configurations for CodeDeploy Blue/Green deployments
-            blue_green_deployment_config=codedeploy.EcsBlueGreenDeploymentConfig(
-                listener=elb.ApplicationListener.from_application_listener_attributes(self,"listener-stg",listener_arn=listener_arn_staging,security_group=ec2.SecurityGroup.from_security_group_id(self,"sg-stg",alb_sg_id_staging)),
-                blue_target_group=elb.ApplicationTargetGroup.from_target_group_attributes(self,"blue_tg-stg",target_group_arn=blue_target_group_arn_staging),
-                green_target_group=elb.ApplicationTargetGroup.from_target_group_attributes(self,"green_tg-stg",target_group_arn=green_target_group_arn_staging)
-            )
-        )
-
-        # Creates the deploy staging stage for CodePipeline
-        deploy_staging_stage = codepipeline.StageProps(
-            stage_name="Deploy-staging",
-            actions=[
-                codepipeline_actions.CodeDeployEcsDeployAction(
-                    action_name="EcsDeploy",
-                    app_spec_template_input=build_image_artifact,
-                    task_definition_template_input=build_image_artifact,
-                    deployment_group=deployment_group_staging
-                )
-            ]
-        )
-
-        #import production values
-        cluster_production= Fn.import_value("ECS-cluster-production")
-        service_production= Fn.import_value("ECS-Service-production")
-        listener_arn_production=Fn.import_value("listener-production")
-        blue_target_group_arn_production=Fn.import_value("tgblue-production")
-        green_target_group_arn_production=Fn.import_value("tggreen-production")
-        alb_sg_id_production=Fn.import_value("albsg-production")
-
-
-        # Creates a new CodeDeploy Deployment Group for production
-        deployment_group_production = codedeploy.EcsDeploymentGroup(
-            self, "CodeDeployGroup-production",
-            service=ecs.FargateService.from_fargate_service_attributes(self,"service-prd",service_arn=service_production, cluster=ecs.Cluster.from_cluster_arn(self,"cluster-prd",cluster_arn=cluster_production)),
-            # Configurations for CodeDeploy Blue/Green deployments
-            blue_green_deployment_config=codedeploy.EcsBlueGreenDeploymentConfig(
-                listener=elb.ApplicationListener.from_application_listener_attributes(self,"listener-prd",listener_arn=listener_arn_production,security_group=ec2.SecurityGroup.from_security_group_id(self,"sg-prd",alb_sg_id_production)),
-                blue_target_group=elb.ApplicationTargetGroup.from_target_group_attributes(self,"blue_tg-prd",target_group_arn=blue_target_group_arn_production),
-                green_target_group=elb.ApplicationTargetGroup.from_target_group_attributes(self,"green_tg-prd",target_group_arn=green_target_group_arn_production)
-            )
-        )
-
-        # Creates the manual approval stage for CodePipeline
-        manual_approval_action = codepipeline_actions.ManualApprovalAction(
-            action_name="Approve",
-        )
-        manual_approval_stage = codepipeline.StageProps(
-            stage_name="ApprovalProduction",
-             actions=[
-                manual_approval_action
-            ]
-        )
+        # Post-deploy test projects, referenced by postDeployTests of an environment
+        post_deploy_tests = {
+            "intergration": ("Build-intergratution", "intergratution", build_intergration, build_intergration_artifact),
+            "load_test": ("Build-load-test", "load-test", build_load_test, build_loadtest_artifact),
+        }
         adminRole = iam.Role.from_role_arn(self, "Admin", Arn.format(ArnComponents(service="iam", resource="role", resource_name="Admin"), self))
-
-        
-        # Creates the deploy production stage for CodePipeline
-        deploy_production_stage = codepipeline.StageProps(
-            stage_name="Deploy-production",
-            actions=[
-
-                codepipeline_actions.CodeDeployEcsDeployAction(
-                    action_name="EcsDeploy",
-                    app_spec_template_input=build_image_artifact,
-                    task_definition_template_input=build_image_artifact,
-                    deployment_group=deployment_group_production
+        manual_approval_actions = []
+        used_post_deploy_tests = set()
+
+        # Creates approval, deploy and post-deploy test stages for each group of environments
+        deploy_stages = []
+        for group in self.__group_deploy_environments(deploy_environments):
+            group_name = "-".join(group)
+            group_config = [deploy_environments[environment] for environment in group]
+
+            # Creates the manual approval stage for CodePipeline
+            if any(config.get("approvalRequired", False) for config in group_config):
+                manual_approval_action = codepipeline_actions.ManualApprovalAction(
+                    action_name="Approve",
                 )
-            ]
-        )
-
-        
+                manual_approval_actions.append(manual_approval_action)
+                deploy_stages.append(codepipeline.StageProps(
+                    stage_name=f"""Approval{"".join(environment.capitalize() for environment in group)}""",
+                    actions=[
+                        manual_approval_action
+                    ]
+                ))
+
+            # Creates the deploy stage for CodePipeline, environments of a group deploy concurrently
+            deploy_actions = []
+            for environment in group:
+                deployment_group = self.__create_deployment_group(environment, wiring_mode)
+                self.deployment_groups.append(deployment_group)
+                deploy_actions.append(
+                    codepipeline_actions.CodeDeployEcsDeployAction(
+                        action_name="EcsDeploy" if len(group) == 1 else f"EcsDeploy-{environment}",
+                        app_spec_template_file=build_image_artifact.at_path(f"appspec-{environment}.yaml"),
+                        task_definition_template_file=build_image_artifact.at_path(f"taskdef-{environment}.json"),
+                        deployment_group=deployment_group
+                    )
+                )
+            deploy_stages.append(codepipeline.StageProps(
+                stage_name=f"Deploy-{group_name}",
+                actions=deploy_actions
+            ))
+
+            # Creates the post-deploy test stages for CodePipeline
+            tests = []
+            for config in group_config:
+                tests.extend(test for test in config.get("postDeployTests", []) if test not in tests)
+            for test in tests:
+                stage_name, action_name, project, artifact = post_deploy_tests[test]
+                # NOTE: Stage and artifact names must be unique, tests used again are suffixed
+                if test in used_post_deploy_tests:
+                    stage_name = f"{stage_name}-{group_name}"
+                    artifact = codepipeline.Artifact(f"{artifact.artifact_name}-{group_name}")
+                used_post_deploy_tests.add(test)
+                deploy_stages.append(codepipeline.StageProps(
+                    stage_name=stage_name,
+                    actions=[
+                        codepipeline_actions.CodeBuildAction(
+                            action_name=action_name,
+                            input=codepipeline.Artifact("SourceArtifact"),
+                            project=project,
+                            outputs=[artifact]
+                        )
+                    ]
+                ))
 
         # Creates an AWS CodePipeline with source, build, and deploy stages
         pipeline = codepipeline.Pipeline(
             self, "workflowPipeline",
-            pipeline_name="workflow-Pipeline",
-            stages=[source_stage,build_stage, build_unittest_stage, build_code_analysis_stage, build_image_stage, deploy_dev_stage,build_intergration_stage, deploy_staging_stage,build_load_test_stage,manual_approval_stage, deploy_production_stage]
+            pipeline_name=WORKFLOW_PIPELINE_NAME,
+            pipeline_type=codepipeline.PipelineType.V2,
+            execution_mode=codepipeline.ExecutionMode[workflow_pipeline_config.get("executionMode", "SUPERSEDED")],
+            stages=[source_stage,build_stage, build_unittest_stage, build_code_analysis_stage, build_image_stage, *pre_deploy_stages, *deploy_stages]
         )
 
+        if trigger_filters:
+            self.__create_filtered_trigger(
+                pipeline=pipeline,
+                code_repository=code_repository,
+                # The started execution deploys the pushed commit, only the source branch by default
+                trigger_filters={"branches": [app_config["branch"]], **trigger_filters},
+            )
+
         pipeline_topic = sns.Topic(self, "pipeline-topic")
         
 
@@ -456,10 +623,209 @@ class workflowPipelineStack(Stack):
             iam.ManagedPolicy.from_aws_managed_policy_name(
                 "service-role/AmazonSNSReadOnlyAccess"))
 
-        manual_approval_action.grant_manual_approval(adminRole)
+        for manual_approval_action in manual_approval_actions:
+            manual_approval_action.grant_manual_approval(adminRole)
 
         sns.Subscription(self, "NotifySubscription",
             topic=pipeline_topic,
             endpoint=notify_lambda.function_arn,
             protocol=sns.SubscriptionProtocol.LAMBDA
-        )
\ No newline at end of file
+        )
+
+    def __group_deploy_environments(self, deploy_environments: Dict) -> List[List[str]]:
+        # Environments are deployed by deployOrder (default: their position in accounts),
+        # environments sharing a deployOrder are deployed concurrently in one stage
+        orders = {}
+        for index, (environment, config) in enumerate(deploy_environments.items()):
+            orders.setdefault(config.get("deployOrder", index), []).append(environment)
+        return [orders[order] for order in sorted(orders)]
+
+    def __create_deployment_group(self, environment: str, wiring_mode: str) -> codedeploy.EcsDeploymentGroup:
+        cluster_arn = import_value(self, f"ECS-cluster-{environment}", wiring_mode)
+        service_arn = import_value(self, f"ECS-Service-{environment}", wiring_mode)
+        listener_arn = import_value(self, f"listener-{environment}", wiring_mode)
+        blue_target_group_arn = import_value(self, f"tgblue-{environment}", wiring_mode)
+        green_target_group_arn = import_value(self, f"tggreen-{environment}", wiring_mode)
+        alb_sg_id = import_value(self, f"albsg-{environment}", wiring_mode)
+
+        # Creates a new CodeDeploy Deployment Group for the environment
+        return codedeploy.EcsDeploymentGroup(
+            self, f"CodeDeployGroup-{environment}",
+            service=ecs.FargateService.from_fargate_service_attributes(self, f"service-{environment}", service_arn=service_arn, cluster=ecs.Cluster.from_cluster_arn(self, f"cluster-{environment}", cluster_arn=cluster_arn)),
+            # Configurations for CodeDeploy Blue/Green deployments
+            blue_green_deployment_config=codedeploy.EcsBlueGreenDeploymentConfig(
+                listener=elb.ApplicationListener.from_application_listener_attributes(self, f"listener-{environment}", listener_arn=listener_arn, security_group=ec2.SecurityGroup.from_security_group_id(self, f"sg-{environment}", alb_sg_id)),
+                blue_target_group=elb.ApplicationTargetGroup.from_target_group_attributes(self, f"blue_tg-{environment}", target_group_arn=blue_target_group_arn),
+                green_target_group=elb.ApplicationTargetGroup.from_target_group_attributes(self, f"green_tg-{environment}", target_group_arn=green_target_group_arn)
+            )
+        )
+
+    def __create_intergration_local_spec(self, dependencies, app_environment) -> Dict:
+        with open("data/app-sources/buildspec_intergration_local.yaml", "r") as f:
+            build_spec = yaml.safe_load(f.read())
+
+        def env_flags(environment):
+            return "".join(f" -e {shlex.quote(f'{name}={value}')}" for name, value in environment.items())
+
+        # Dependencies run on the same docker network as the app, reachable by their name
+        dependency_commands = []
+        for dependency in dependencies:
+            dependency_commands.append(
+                f"docker run -d --name {dependency['name']} --network {INTERGRATION_LOCAL_NETWORK}{env_flags(dependency.get('environment', {}))} {dependency['image']}"
+            )
+
+        commands = build_spec["phases"]["pre_build"]["commands"]
+        index = commands.index(f"docker network create {INTERGRATION_LOCAL_NETWORK}") + 1
+        commands[index:index] = dependency_commands
+
+        # Environment of the app container, e.g. the host names of the dependencies
+        app_command = f"docker run -d --name app --network {INTERGRATION_LOCAL_NETWORK}"
+        index = next(index for index, command in enumerate(commands) if command.startswith(app_command))
+        commands[index] = commands[index].replace(app_command, app_command + env_flags(app_environment), 1)
+        return build_spec
+
+    def __create_sharded_unittest_project(
+        self,
+        *,
+        build_spec: Dict,
+        timings_build_spec: Dict,
+        environment: codebuild.BuildEnvironment,
+        timings_environment: codebuild.BuildEnvironment,
+        source: codebuild.ISource,
+        shards: int,
+        env: Environment,
+    ) -> Tuple[codebuild.Project, codebuild.PipelineProject]:
+        # Durations of test classes of the last completed run, used to balance the shards
+        # NOTE: The stage runs one execution at a time unless executionMode is PARALLEL.
+        timings_bucket = s3.Bucket(
+            self, "UnittestTimingsBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+        )
+        shard_script = s3_assets.Asset(self, "UnittestShardScript", path=UNITTEST_SHARD_SCRIPT)
+
+        # Every shard reports to the same report group, merging the JUnit results
+        report_group = codebuild.ReportGroup(
+            self, "UnittestReportGroup",
+            report_group_name=UNITTEST_REPORT_GROUP_NAME,
+            type=codebuild.ReportGroupType.TEST,
+        )
+
+        # NOTE: The buildspec is rendered at synth time, the report group is keyed by its literal ARN
+        report_group_arn = f"arn:aws:codebuild:{env.region}:{env.account}:report-group/{UNITTEST_REPORT_GROUP_NAME}"
+        build_spec = dict(
+            build_spec,
+            reports={
+                report_group_arn: {
+                    "files": UNITTEST_REPORT_FILES,
+                    "file-format": "JUNITXML",
+                }
+            },
+            batch={
+                "fast-fail": False,
+                "build-matrix": {
+                    "dynamic": {
+                        "env": {
+                            "variables": {
+                                "SHARD_INDEX": [str(index) for index in range(shards)],
+                            }
+                        }
+                    }
+                },
+            },
+        )
+
+        timings_variables = {
+            "SHARD_SCRIPT_BUCKET": codebuild.BuildEnvironmentVariable(value=shard_script.s3_bucket_name),
+            "SHARD_SCRIPT_KEY": codebuild.BuildEnvironmentVariable(value=shard_script.s3_object_key),
+            "TIMINGS_BUCKET": codebuild.BuildEnvironmentVariable(value=timings_bucket.bucket_name),
+            "TIMINGS_KEY": codebuild.BuildEnvironmentVariable(value=UNITTEST_TIMINGS_KEY),
+        }
+        build_unittest = codebuild.Project(
+            self, "Build-unittest",
+            build_spec=codebuild.BuildSpec.from_object_to_yaml(build_spec),
+            environment=environment,
+            source=source,
+            environment_variables={
+                "SHARD_COUNT": codebuild.BuildEnvironmentVariable(value=str(shards)),
+                **timings_variables,
+            }
+        )
+        build_unittest.enable_batch_builds()
+
+        # Merges the shard-*.json files of the combined batch artifact into the timings file
+        build_unittest_timings = codebuild.PipelineProject(
+            self, "Build-unittest-timings",
+            build_spec=codebuild.BuildSpec.from_object_to_yaml(timings_build_spec),
+            environment=timings_environment,
+            environment_variables=timings_variables,
+        )
+
+        timings_bucket.grant_read(build_unittest)
+        timings_bucket.grant_write(build_unittest_timings)
+        shard_script.grant_read(build_unittest)
+        shard_script.grant_read(build_unittest_timings)
+        report_group.grant_write(build_unittest)
+        return build_unittest, build_unittest_timings
+
+    def __create_filtered_trigger(
+        self,
+        *,
+        pipeline: codepipeline.Pipeline,
+        code_repository: codecommit.IRepository,
+        trigger_filters: Dict,
+    ) -> lambdaFunc.Function:
+        # NOTE: Trigger filters of V2 pipelines only support CodeStar connections sources,
+        # CodeCommit pushes are filtered by branch and changed file paths in a Lambda function.
+        with open("./lambda/filter_pipeline_trigger.py", encoding="utf8") as fp:
+            handler_code = fp.read()
+
+        trigger_lambda = lambdaFunc.Function(
+            self, "FilterPipelineTrigger",
+            architecture=lambdaFunc.Architecture.ARM_64,
+            code=lambdaFunc.InlineCode(handler_code),
+            handler="index.lambda_handler",
+            runtime=lambdaFunc.Runtime.PYTHON_3_10,
+            environment={
+                "PIPELINE_NAME": WORKFLOW_PIPELINE_NAME,
+                "SOURCE_ACTION_NAME": SOURCE_ACTION_NAME,
+                "TRIGGER_FILTERS": json.dumps(trigger_filters),
+            },
+            initial_policy=[
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["codecommit:GetDifferences"],
+                    resources=[code_repository.repository_arn]
+                ),
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["codepipeline:StartPipelineExecution"],
+                    resources=[pipeline.pipeline_arn]
+                ),
+            ]
+        )
+
+        # Pushes to other branches do not invoke the function, fnmatch then applies the same patterns.
+        reference_names = []
+        for pattern in trigger_filters["branches"]:
+            if "?" in pattern or "[" in pattern:
+                raise ValueError(f"workflowPipeline.triggers.branches: only * wildcards are supported, not {pattern}")
+            reference_names.append({"wildcard": pattern} if "*" in pattern else pattern)
+
+        events.Rule(
+            self, "FilterPipelineTriggerRule",
+            event_pattern=events.EventPattern(
+                source=["aws.codecommit"],
+                detail_type=["CodeCommit Repository State Change"],
+                resources=[code_repository.repository_arn],
+                detail={
+                    "event": ["referenceCreated", "referenceUpdated"],
+                    "referenceType": ["branch"],
+                    "referenceName": reference_names,
+                },
+            ),
+            targets=[events_targets.LambdaFunction(trigger_lambda)],
+        )
+
+        return trigger_lambda
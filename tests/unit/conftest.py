@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from aws_cdk import App, Environment
+
+from stacks.data import load_parameters
+from stacks.stages import DeployStage
+
+
+@pytest.fixture
+def parameters():
+    return load_parameters()
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    App with the context of cdk.json, as `cdk synth` runs it.
+    """
+    with open("cdk.json") as f:
+        context = json.load(f)["context"]
+    return App(context=context, outdir=str(tmp_path))
+
+
+@pytest.fixture
+def deploy_stage(app, parameters):
+    """
+    Return a factory of the dev DeployStage of the first region, with an app config override.
+    """
+    def create(stage_id="dev", **app_config_override):
+        region = parameters["regions"][0]
+        account = parameters["accounts"]["dev"]
+        return DeployStage(
+            app,
+            stage_id,
+            environment="dev",
+            region=region["region"],
+            app_config={**parameters["appConfig"], **app_config_override},
+            env=Environment(account=region["accountId"], region=region["region"]),
+            cidr=account["cidr"],
+            ecr_repository="",
+            env_config=account,
+        )
+    return create
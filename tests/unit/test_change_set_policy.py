@@ -0,0 +1,23 @@
+from scripts.change_set_policy import check_no_replacements
+
+CHANGES = [
+    {"Action": "Modify", "LogicalResourceId": "TaskDefinition", "ResourceType": "AWS::ECS::TaskDefinition", "Replacement": "True"},
+    {"Action": "Modify", "LogicalResourceId": "Service", "ResourceType": "AWS::ECS::Service", "Replacement": "False"},
+]
+
+
+def test_replacements_are_allowed_when_disabled():
+    assert check_no_replacements(CHANGES, False) == []
+    assert check_no_replacements(CHANGES, None) == []
+
+
+def test_replacements_are_violations_when_enabled():
+    assert len(check_no_replacements(CHANGES, True)) == 1
+
+
+def test_empty_list_allows_no_replacements():
+    assert len(check_no_replacements(CHANGES, [])) == 1
+
+
+def test_listed_resource_types_may_be_replaced():
+    assert check_no_replacements(CHANGES, ["AWS::ECS::TaskDefinition"]) == []
@@ -0,0 +1,61 @@
+import pytest
+from aws_cdk import Environment
+from aws_cdk.assertions import Template
+
+from stacks.cross_account_deploy_pipeline import (
+    DESCRIBE_CHANGE_SET_ACTION_ID,
+    CrossAccountDeployPipelines,
+    PipelineUtils,
+)
+
+
+@pytest.fixture
+def consumer_stacks_stage(deploy_stage, parameters):
+    app_config = parameters["appConfig"]
+    return deploy_stage(
+        cdn={**app_config["cdn"], "enabled": True},
+        syntheticProbes={**app_config["syntheticProbes"], "enabled": True},
+    )
+
+
+def synthesize_pipeline(app, parameters, stage, batch_describe_change_sets):
+    region = parameters["regions"][0]
+    pipelines = CrossAccountDeployPipelines(
+        app,
+        app_name="app-deployment",
+        pipeline_env=Environment(account=region["accountId"], region=region["region"]),
+        batch_describe_change_sets=batch_describe_change_sets,
+        create_meta_pipelines=False,
+    )
+    pipeline_stage = pipelines.add_target_environment("dev", deploy_stages=[stage])
+    app.synth()
+    return Template.from_stack(pipeline_stage.pipeline_stack)
+
+
+def describe_change_set_actions(template):
+    pipeline = next(iter(template.find_resources("AWS::CodePipeline::Pipeline").values()))
+    return [
+        action["Name"]
+        for stage in pipeline["Properties"]["Stages"]
+        for action in stage["Actions"]
+        if action["Name"].endswith(DESCRIBE_CHANGE_SET_ACTION_ID)
+    ]
+
+
+def test_stacks_are_grouped_by_dependency_level(consumer_stacks_stage):
+    groups = PipelineUtils.group_by_dependency_level(PipelineUtils.get_stacks(consumer_stacks_stage))
+
+    assert [[stack.node.id for stack in group] for group in groups] == [["ECS"], ["CDN", "Probe"]]
+
+
+def test_batched_change_sets_are_described_per_dependency_level(app, parameters, consumer_stacks_stage):
+    template = synthesize_pipeline(app, parameters, consumer_stacks_stage, batch_describe_change_sets=True)
+
+    assert len(describe_change_set_actions(template)) == 2
+
+
+def test_change_sets_are_described_per_stack(app, parameters, consumer_stacks_stage):
+    template = synthesize_pipeline(app, parameters, consumer_stacks_stage, batch_describe_change_sets=False)
+
+    assert len(describe_change_set_actions(template)) == 3
+
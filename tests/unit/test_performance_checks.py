@@ -0,0 +1,19 @@
+from aws_cdk.assertions import Annotations, Match
+
+from stacks.cross_account_deploy_pipeline import PipelineUtils
+from utils.performance_checks import CONTEXT_KEY
+
+
+def ecs_stack_warnings(stage):
+    ecs_stack = next(stack for stack in PipelineUtils.get_stacks(stage) if stack.node.id == "ECS")
+    return Annotations.from_stack(ecs_stack).find_warning("*", Match.string_like_regexp(r"^\[Performance-ELB1\]"))
+
+
+def test_stacks_of_a_stage_are_checked(deploy_stage):
+    assert ecs_stack_warnings(deploy_stage())
+
+
+def test_checks_are_off(app, deploy_stage):
+    app.node.set_context(CONTEXT_KEY, "off")
+
+    assert not ecs_stack_warnings(deploy_stage())
@@ -0,0 +1,32 @@
+import json
+
+from scripts import shard_tests
+
+
+def write_json(path, value):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(value))
+
+
+def test_merge_replaces_the_timings_with_the_shards_of_the_batch(tmp_path, monkeypatch):
+    write_json(tmp_path / "batch" / "build1" / "shard-0.json", {"a.ATest": 2.0})
+    write_json(tmp_path / "batch" / "build2" / "shard-1.json", {"b.BTest": 1.0})
+    output = tmp_path / "timings.json"
+    write_json(output, {"removed.OldTest": 9.0})
+    monkeypatch.setenv("TIMINGS_DIR", str(tmp_path / "batch"))
+    monkeypatch.setenv("TIMINGS_OUTPUT", str(output))
+
+    shard_tests.merge()
+
+    assert json.loads(output.read_text()) == {"a.ATest": 2.0, "b.BTest": 1.0}
+
+
+def test_missing_timings_file_has_no_timings(tmp_path):
+    assert shard_tests.load_timings(str(tmp_path / "timings.json")) == {}
+
+
+def test_every_class_is_assigned_once():
+    classes = ["a.ATest", "b.BTest", "c.CTest", "d.DTest"]
+    shards = shard_tests.assign_shards(classes, {"a.ATest": 3.0, "b.BTest": 1.0}, 3)
+
+    assert sorted(name for _, names in shards for name in names) == classes
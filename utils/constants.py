@@ -1,4 +1,44 @@
 class Constants:
     DEFAULT_HTTP_PORT = 80
     DEFAULT_HTTPS_PORT = 443
-    DEFAULT_CIDR_IPV4_ALL = "0.0.0.0/0"
\ No newline at end of file
+    DEFAULT_CIDR_IPV4_ALL = "0.0.0.0/0"
+
+    # Cross-stack wiring: CloudFormation exports, SSM parameters, or both while migrating
+    WIRING_MODE_EXPORTS = "exports"
+    WIRING_MODE_SSM = "ssm"
+    WIRING_MODE_BOTH = "both"
+    WIRING_MODES = (WIRING_MODE_EXPORTS, WIRING_MODE_SSM, WIRING_MODE_BOTH)
+    SSM_WIRING_PARAMETER_PREFIX = "/app-deployment/wiring"
+
+    # Synthetic probes: CloudWatch namespace and alarm name prefix (canary.bake.alarmNamePrefixes)
+    SYNTHETIC_PROBE_NAMESPACE = "SyntheticProbe"
+    SYNTHETIC_PROBE_ALARM_PREFIX = "SyntheticProbe"
+
+    # Task size and scaling of the ECS service per environment (accounts.<env>.scaling)
+    DEFAULT_SCALING = {
+        "cpu": 256,
+        "memory": 512,
+        "desiredCount": 1,
+        "minCapacity": 1,
+        "maxCapacity": 1,
+        "targetCpuPercent": 70,
+    }
+
+    # App container and ALB target group health check, mimicked by scripts/generate_local_stack.py
+    CONTAINER_NAME = "web"
+    CONTAINER_PORT = 8080
+    HEALTH_CHECK_PATH = "/{app_name}/index.jsp"
+    HEALTH_CHECK_HEALTHY_HTTP_CODES = "200,301,302"
+    HEALTH_CHECK_HEALTHY_THRESHOLD = 3
+    HEALTH_CHECK_UNHEALTHY_THRESHOLD = 5
+    HEALTH_CHECK_INTERVAL_SECONDS = 30
+    HEALTH_CHECK_TIMEOUT_SECONDS = 5
+    ALB_IDLE_TIMEOUT_SECONDS = 60
+
+    # Fargate CPU architecture per environment (accounts.<env>.cpuArchitecture) and its image platform
+    DEFAULT_CPU_ARCHITECTURE = "X86_64"
+    CPU_ARCHITECTURE_PLATFORMS = {
+        "X86_64": "linux/amd64",
+        "ARM64": "linux/arm64",
+    }
+    DEFAULT_IMAGE_PLATFORMS = ["linux/amd64", "linux/arm64"]
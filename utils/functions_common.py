@@ -1,3 +1,63 @@
+import hashlib
+
+from aws_cdk import CfnOutput, Fn, aws_ssm as ssm
+from constructs import Construct
+
+from utils.constants import Constants
+
+
 def create_resource_name (resource_name, environment, region):
     resource_name = f"{resource_name}-{environment}-{region}"
-    return resource_name
\ No newline at end of file
+    return resource_name
+
+
+def compute_files_hash(paths, *extra):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    for value in extra:
+        digest.update(str(value).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def ssm_parameter_name(export_name):
+    return f"{Constants.SSM_WIRING_PARAMETER_PREFIX}/{export_name}"
+
+
+def publish_value(scope: Construct, construct_id, value, export_name, wiring_mode):
+    """
+    Publish a value consumed by other stacks as a CloudFormation export and/or an SSM parameter.
+    """
+    if wiring_mode not in Constants.WIRING_MODES:
+        raise ValueError(f"Unknown wiring mode: {wiring_mode}")
+
+    uses_exports = wiring_mode in (Constants.WIRING_MODE_EXPORTS, Constants.WIRING_MODE_BOTH)
+    output = CfnOutput(scope, construct_id, value=value, export_name=export_name if uses_exports else None)
+    if wiring_mode in (Constants.WIRING_MODE_SSM, Constants.WIRING_MODE_BOTH):
+        ssm.StringParameter(
+            scope,
+            f"{construct_id}Parameter",
+            parameter_name=ssm_parameter_name(export_name),
+            string_value=value,
+        )
+    return output
+
+
+def import_value(scope: Construct, export_name, wiring_mode):
+    """
+    Return a value published by publish_value, SSM parameters are resolved at deploy time.
+    """
+    if wiring_mode not in Constants.WIRING_MODES:
+        raise ValueError(f"Unknown wiring mode: {wiring_mode}")
+
+    if wiring_mode == Constants.WIRING_MODE_EXPORTS:
+        return Fn.import_value(export_name)
+    return ssm.StringParameter.value_for_string_parameter(scope, ssm_parameter_name(export_name))
+
+
+def get_scaling_config(env_config):
+    """
+    Return the scaling section of an environment merged over the defaults.
+    """
+    return {**Constants.DEFAULT_SCALING, **env_config.get("scaling", {})}
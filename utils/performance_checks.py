@@ -0,0 +1,146 @@
+import json
+import re
+
+import jsii
+from aws_cdk import (
+    Annotations,
+    Aspects,
+    IAspect,
+    Stack,
+    Stage,
+    Token,
+    aws_codebuild as codebuild,
+    aws_ecs as ecs,
+    aws_elasticloadbalancingv2 as elb,
+)
+from constructs import Construct, IConstruct
+
+CONTEXT_KEY = "performance-checks"
+MODE_OFF = "off"
+MODE_WARN = "warn"
+MODE_FAIL = "fail"
+MODES = (MODE_OFF, MODE_WARN, MODE_FAIL)
+SUPPRESSIONS_METADATA_TYPE = "performance-checks-suppression"
+
+# Smallest container / task memory a Tomcat JVM runs in without frequent GC or OOM kills
+MIN_JVM_MEMORY_MIB = 512
+# Default ALB deregistration delay, slows down every blue/green and scale-in
+DEFAULT_DEREGISTRATION_DELAY_SECONDS = 300
+LATEST_TAG = re.compile(r""":latest"?$""")
+
+RULES = {
+    "Performance-ECS1": "The Fargate service has no auto scaling policy, its task count is fixed",
+    "Performance-ECS2": f"The task or container memory is below {MIN_JVM_MEMORY_MIB} MiB, too little for the JVM",
+    "Performance-ECS3": "The container image uses the latest tag, every task start may pull a different image and layer caches miss",
+    "Performance-ECS4": "The tasks get public IPs and pull images over the internet instead of VPC endpoints",
+    "Performance-CB1": "The CodeBuild project has no cache, dependencies are downloaded on every build",
+    "Performance-ELB1": f"The target group keeps the default {DEFAULT_DEREGISTRATION_DELAY_SECONDS}s deregistration delay",
+}
+
+
+@jsii.implements(IAspect)
+class PerformanceChecks:
+    """
+    Performance rule pack, added to each Stage as an Aspect with `add_to`.
+
+    Findings are reported as warnings, or as errors failing `cdk synth` with
+    `-c performance-checks=fail`. `-c performance-checks=off` disables the checks.
+    Rules are suppressed per construct and its children with `add_suppression`.
+    """
+
+    def __init__(self, mode=MODE_WARN):
+        if mode not in MODES:
+            raise ValueError(f"Unknown performance checks mode: {mode}")
+        self.mode = mode
+
+    @staticmethod
+    def from_context(scope: Construct):
+        """
+        Return the checks of the performance-checks context flag, None if they are off.
+        """
+        mode = scope.node.try_get_context(CONTEXT_KEY) or MODE_WARN
+        if mode in (False, "false", MODE_OFF):
+            return None
+        return PerformanceChecks(MODE_WARN if mode in (True, "true") else mode)
+
+    @staticmethod
+    def add_to(stage: Stage):
+        """
+        Add the checks of the context flag to the stage. Aspects of the app do not
+        reach the stacks of nested stages, so every Stage adds them itself.
+        """
+        checks = PerformanceChecks.from_context(stage)
+        if checks is not None:
+            Aspects.of(stage).add(checks)
+
+    @staticmethod
+    def add_suppression(construct: Construct, rule_id: str, reason: str):
+        if rule_id not in RULES:
+            raise ValueError(f"Unknown performance rule: {rule_id}")
+        construct.node.add_metadata(SUPPRESSIONS_METADATA_TYPE, {"id": rule_id, "reason": reason})
+
+    def visit(self, node: IConstruct) -> None:
+        if isinstance(node, ecs.FargateService):
+            # NOTE: auto_scale_task_count creates the scalable target as the TaskCount child.
+            if node.node.try_find_child("TaskCount") is None:
+                self.__report(node, "Performance-ECS1")
+        elif isinstance(node, ecs.CfnTaskDefinition):
+            self.__check_task_definition(node)
+        elif isinstance(node, ecs.CfnService):
+            network_configuration = self.__resolve(node, node.network_configuration) or {}
+            awsvpc_configuration = network_configuration.get("awsvpcConfiguration", {})
+            if awsvpc_configuration.get("assignPublicIp") == "ENABLED":
+                self.__report(node, "Performance-ECS4")
+        elif isinstance(node, codebuild.CfnProject):
+            cache = self.__resolve(node, node.cache)
+            if cache is None or cache.get("type") == "NO_CACHE":
+                self.__report(node, "Performance-CB1")
+        elif isinstance(node, elb.CfnTargetGroup):
+            if node.target_type == "lambda":
+                return
+            attributes = {
+                attribute["key"]: attribute["value"]
+                for attribute in self.__resolve(node, node.target_group_attributes) or []
+            }
+            delay = attributes.get("deregistration_delay.timeout_seconds", str(DEFAULT_DEREGISTRATION_DELAY_SECONDS))
+            if delay == str(DEFAULT_DEREGISTRATION_DELAY_SECONDS):
+                self.__report(node, "Performance-ELB1")
+
+    def __check_task_definition(self, node: ecs.CfnTaskDefinition):
+        memory_values = [node.memory]
+        images = []
+        for container in self.__resolve(node, node.container_definitions) or []:
+            memory_values.append(container.get("memory"))
+            images.append(container.get("image"))
+
+        if any(
+            value is not None and not Token.is_unresolved(value) and int(value) < MIN_JVM_MEMORY_MIB
+            for value in memory_values
+        ):
+            self.__report(node, "Performance-ECS2")
+
+        # NOTE: Repository images are Fn::Join tokens, the tag is the end of the joined value.
+        for image in images:
+            if image is not None and LATEST_TAG.search(json.dumps(image).rstrip("]}")):
+                self.__report(node, "Performance-ECS3")
+                break
+
+    # NOTE: Resolved L1 properties keep the camelCase keys of their Python/JS types.
+    def __resolve(self, node, value):
+        return None if value is None else Stack.of(node).resolve(value)
+
+    def __is_suppressed(self, node: IConstruct, rule_id: str):
+        for scope in node.node.scopes:
+            for entry in scope.node.metadata:
+                if entry.type == SUPPRESSIONS_METADATA_TYPE and entry.data["id"] == rule_id:
+                    return True
+        return False
+
+    def __report(self, node: IConstruct, rule_id: str):
+        if self.__is_suppressed(node, rule_id):
+            return
+        message = f"[{rule_id}] {RULES[rule_id]}. Suppress with PerformanceChecks.add_suppression if intended."
+        if self.mode == MODE_FAIL:
+            Annotations.of(node).add_error(message)
+        else:
+            Annotations.of(node).add_warning_v2(rule_id, message)
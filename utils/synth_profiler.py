@@ -0,0 +1,161 @@
+import functools
+import os
+import sys
+import time
+import tracemalloc
+
+import jsii._kernel.providers.process
+
+CONTEXT_KEY = "synth-profile"
+DEFAULT_OUTPUT_DIR = "synth-profile"
+REPORT_FILE = "report.txt"
+COLLAPSED_FILE = "synth.collapsed"
+
+# Every kernel request crosses the Python <-> Node.js boundary through the send() of the
+# process provider. NOTE: The Kernel methods are bound to module-level functions of jsii
+# (jsii.invoke, jsii.get, ...) at import time, patching them on the class misses those calls.
+JSII_REQUEST_CLASS = jsii._kernel.providers.process._NodeProcess
+JSII_REQUEST_METHOD = "send"
+
+
+class _Frame:
+    def __init__(self, path):
+        self.path = path
+        self.wall_seconds = 0.0
+        self.child_wall_seconds = 0.0
+        self.jsii_calls = 0
+        self.child_jsii_calls = 0
+        self.allocated_bytes = 0
+        self.calls = 0
+
+
+class SynthProfiler:
+    """
+    Opt-in synth profiler, enabled with `cdk synth -c synth-profile=<output dir>`.
+
+    Wrapped constructors and methods are timed as nested frames. Each frame records
+    wall time, the number of jsii kernel requests and the Python allocation delta
+    (tracemalloc, Node.js side allocations are not visible). A report sorted by wall
+    time and a collapsed-stack file (self time in microseconds, for flamegraph.pl or
+    speedscope) are written on `report()`.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.frames = {}
+        self.current = None
+        self.jsii_calls = 0
+
+        tracemalloc.start()
+        self.__count_jsii_calls(JSII_REQUEST_CLASS, JSII_REQUEST_METHOD)
+
+    @staticmethod
+    def from_context(app):
+        """
+        Return a profiler if the synth-profile context flag is set, None otherwise.
+        """
+        value = app.node.try_get_context(CONTEXT_KEY)
+        if value in (None, False, "false"):
+            return None
+        return SynthProfiler(DEFAULT_OUTPUT_DIR if value in (True, "true") else value)
+
+    def wrap(self, *classes, method_name="__init__"):
+        """
+        Time every call of the given method (the constructor by default) of each class.
+        """
+        for cls in classes:
+            label = cls.__name__ if method_name == "__init__" else f"{cls.__name__}.{method_name}"
+            setattr(cls, method_name, self.__measured(getattr(cls, method_name), label))
+
+    def measure(self, name):
+        return _Measure(self, name)
+
+    def report(self):
+        frames = sorted(self.frames.values(), key=lambda frame: frame.wall_seconds, reverse=True)
+        lines = [
+            f"{'wall ms':>10} {'self ms':>10} {'calls':>6} {'jsii':>8} {'self jsii':>10} {'alloc KiB':>10}  frame",
+        ]
+        for frame in frames:
+            lines.append(
+                f"{frame.wall_seconds * 1000:>10.1f}"
+                f" {(frame.wall_seconds - frame.child_wall_seconds) * 1000:>10.1f}"
+                f" {frame.calls:>6}"
+                f" {frame.jsii_calls:>8}"
+                f" {frame.jsii_calls - frame.child_jsii_calls:>10}"
+                f" {frame.allocated_bytes / 1024:>10.1f}"
+                f"  {frame.path}"
+            )
+        lines.append(f"Total jsii kernel requests: {self.jsii_calls}")
+        _, peak = tracemalloc.get_traced_memory()
+        lines.append(f"Peak traced Python memory: {peak / 1024 / 1024:.1f} MiB")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, REPORT_FILE), "w") as f:
+            f.write("\n".join(lines) + "\n")
+        with open(os.path.join(self.output_dir, COLLAPSED_FILE), "w") as f:
+            for frame in self.frames.values():
+                self_microseconds = int((frame.wall_seconds - frame.child_wall_seconds) * 1_000_000)
+                if self_microseconds > 0:
+                    f.write(f"{frame.path} {self_microseconds}\n")
+
+        print("\n".join(lines), file=sys.stderr)
+        print(f"Synth profile written to {self.output_dir}", file=sys.stderr)
+
+    def __measured(self, original, label):
+        @functools.wraps(original)
+        def wrapper(instance, *args, **kwargs):
+            # NOTE: Constructs are created with (scope, construct_id, ...):
+            construct_id = args[1] if len(args) > 1 and isinstance(args[1], str) else None
+            with self.measure(f"{label}({construct_id})" if construct_id else label):
+                return original(instance, *args, **kwargs)
+
+        return wrapper
+
+    def __count_jsii_calls(self, cls, method_name):
+        original = getattr(cls, method_name)
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            self.jsii_calls += 1
+            return original(*args, **kwargs)
+
+        setattr(cls, method_name, wrapper)
+
+
+class _Measure:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        parent = profiler.current
+        path = self.name if parent is None else f"{parent.path};{self.name}"
+        frame = profiler.frames.get(path)
+        if frame is None:
+            frame = profiler.frames[path] = _Frame(path)
+
+        self.parent = parent
+        self.frame = frame
+        self.start_jsii_calls = profiler.jsii_calls
+        self.start_memory, _ = tracemalloc.get_traced_memory()
+        self.start = time.perf_counter()
+        profiler.current = frame
+        return frame
+
+    def __exit__(self, *exc_info):
+        profiler = self.profiler
+        wall_seconds = time.perf_counter() - self.start
+        jsii_calls = profiler.jsii_calls - self.start_jsii_calls
+        memory, _ = tracemalloc.get_traced_memory()
+
+        frame = self.frame
+        frame.calls += 1
+        frame.wall_seconds += wall_seconds
+        frame.jsii_calls += jsii_calls
+        frame.allocated_bytes += memory - self.start_memory
+        if self.parent is not None:
+            self.parent.child_wall_seconds += wall_seconds
+            self.parent.child_jsii_calls += jsii_calls
+        profiler.current = self.parent
+        return False